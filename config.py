@@ -1,50 +1,102 @@
 from solana.rpc.api import Client
+from solana.rpc.async_api import AsyncClient
 from solders.keypair import Keypair 
 from solders.pubkey import Pubkey
 import os
+import asyncio
+import base64
+import pickle
 import logging
+import threading
+import functools
 import yaml
-from typing import Dict, Any
+import httpx
+from typing import Dict, Any, List, Optional
 from pathlib import Path
-from dotenv import load_dotenv
+from types import SimpleNamespace
+from dotenv import find_dotenv, load_dotenv
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Prefer libyaml's C-backed loader, fall back to the pure-Python one
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# RPC connection pool; httpx drops idle keep-alive connections after 5 s by default,
+# which puts a fresh TLS handshake in front of the first swap after a pause
+RPC_TIMEOUT = 10.0
+RPC_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=120)
+
+# HTTP/2 multiplexes requests over one connection; it needs the h2 package from requirements.txt
+try:
+    import h2  # noqa: F401
+    RPC_HTTP2 = True
+except ImportError:
+    RPC_HTTP2 = False
+
+@functools.lru_cache(maxsize=4096)
+def _pk(s: str) -> Pubkey:
+    """Decode a base58 address, memoized across all callers; invalid ones raise ValueError and are not cached"""
+    return Pubkey.from_string(s)
+
+# Session close tasks still running; asyncio only keeps weak references to tasks
+_CLOSING_SESSIONS = set()
+
+def _close_async_session(session: httpx.AsyncClient) -> None:
+    """Close an httpx.AsyncClient from synchronous code, on the running event loop if there is one"""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        asyncio.run(session.aclose())
+    else:
+        task = loop.create_task(session.aclose())
+        _CLOSING_SESSIONS.add(task)
+        task.add_done_callback(_session_closed)
+
+def _session_closed(task: asyncio.Task) -> None:
+    """Drop a finished close task, logging its failure if it had one"""
+    _CLOSING_SESSIONS.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.debug("Could not close async HTTP session: %s", task.exception())
+
 class Config:
     """Configuration manager for the application"""
     
     def __init__(self):
         self._config = {}
+        self._payer_keypair = None
         self._load_env()
         self._load_yaml()
         self._validate_config()
+        self._flat = self._flatten(self._config)
+        self.cfg = self._namespace(self._config)
 
     def _load_env(self):
         """Load environment variables"""
-        load_dotenv(override=True)
+        # Only touch .env when the process environment is incomplete
+        if not (os.environ.get('HELIUS_API_KEY') and os.environ.get('ACC_PRIVATE_KEY')):
+            dotenv_path = find_dotenv()
+            if dotenv_path:
+                load_dotenv(dotenv_path, override=False)
         
-        # Required environment variables
-        required_vars = [
-            'HELIUS_API_KEY',
-            'ACC_PRIVATE_KEY'
-        ]
+        # Required environment variables, read once
+        helius_key = os.getenv('HELIUS_API_KEY')
+        acc_key = os.getenv('ACC_PRIVATE_KEY')
         
-        # Validate and load required variables
-        for var in required_vars:
-            value = os.getenv(var)
+        # Validate required variables
+        for var, value in (('HELIUS_API_KEY', helius_key), ('ACC_PRIVATE_KEY', acc_key)):
             if not value:
                 raise ValueError(f"Missing required environment variable: {var}")
             
         # Load environment-specific configuration
         self._config['env'] = {
             'helius': {
-                'api_key': os.getenv('HELIUS_API_KEY'),
-                'ws_url': f"wss://atlas-mainnet.helius-rpc.com/?api-key={os.getenv('HELIUS_API_KEY')}",
-                'rpc_url': f"https://mainnet.helius-rpc.com/?api-key={os.getenv('HELIUS_API_KEY')}",
-                'staked_rpc_url': f"https://staked.helius-rpc.com?api-key={os.getenv('HELIUS_API_KEY')}"
+                'api_key': helius_key,
+                'ws_url': f"wss://mainnet.helius-rpc.com/?api-key={helius_key}",
+                'rpc_url': f"https://mainnet.helius-rpc.com/?api-key={helius_key}",
+                'staked_rpc_url': f"https://staked.helius-rpc.com?api-key={helius_key}"
             },
-            'acc_private_key': os.getenv('ACC_PRIVATE_KEY')
+            'acc_private_key': acc_key
         }
 
     def _load_yaml(self):
@@ -53,8 +105,27 @@ class Config:
         if not config_path.exists():
             raise FileNotFoundError(f"Configuration file not found: {config_path}")
             
-        with open(config_path) as f:
-            self._config.update(yaml.safe_load(f))
+        # Reuse the parsed config from the sidecar cache while config.yaml is unchanged
+        mtime = config_path.stat().st_mtime_ns
+        cache_path = config_path.with_suffix('.yaml.pkl')
+        try:
+            cached = pickle.loads(cache_path.read_bytes())
+        except Exception as e:
+            # A missing, truncated or foreign sidecar just means parsing the YAML again
+            logger.debug("Config cache %s not used: %s", cache_path, e)
+            cached = None
+        if isinstance(cached, tuple) and len(cached) == 2 and cached[0] == mtime and isinstance(cached[1], dict):
+            self._config.update(cached[1])
+            return
+            
+        logger.debug("Loading YAML configuration with %s", Loader.__name__)
+        parsed = yaml.load(config_path.read_bytes(), Loader=Loader)
+        self._config.update(parsed)
+        
+        try:
+            cache_path.write_bytes(pickle.dumps((mtime, parsed)))
+        except OSError as e:
+            logger.debug("Could not write config cache %s: %s", cache_path, e)
             
     def _validate_config(self):
         """Validate configuration"""
@@ -73,108 +144,177 @@ class Config:
         if 'unit_budget' not in solana_config or 'unit_price' not in solana_config:
             raise ValueError("Missing Solana unit budget or price configuration")
             
+        # Validate Raydium API configuration
+        raydium_config = self._config['programs'].get('raydium', {})
+        if not raydium_config.get('api_v3_pools_info_url'):
+            raise ValueError("Missing Raydium API v3 pools info URL configuration")
+            
         # No need to set private key again as it's already in env section
 
+    @classmethod
+    def _flatten(cls, data: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+        """Flatten nested configuration into a dict keyed by dotted path"""
+        flat = {}
+        for k, v in data.items():
+            path = f"{prefix}{k}"
+            flat[path] = v
+            if isinstance(v, dict):
+                flat.update(cls._flatten(v, f"{path}."))
+        return flat
+
+    @classmethod
+    def _namespace(cls, data: Dict[str, Any]) -> SimpleNamespace:
+        """Bind nested configuration to attributes, e.g. cfg.solana.unit_budget"""
+        return SimpleNamespace(**{
+            k: cls._namespace(v) if isinstance(v, dict) else v
+            for k, v in data.items()
+        })
+
     def get(self, key: str, default: Any = None) -> Any:
         """Get configuration value by key"""
-        keys = key.split('.')
-        value = self._config
-        for k in keys:
-            if isinstance(value, dict):
-                value = value.get(k)
-            else:
-                return default
-        return value
+        return self._flat.get(key, default)
     
     def get_payer_keypair(self) -> Keypair:
         """Get wallet keypair"""
+        if self._payer_keypair is not None:
+            return self._payer_keypair
+        
         try:
-            private_key = self._config['env']['acc_private_key'].strip()
+            private_key = self.cfg.env.acc_private_key.strip()
+            logger.debug("Payer key length=%d", len(private_key))
           
-            if private_key.startswith('[') and private_key.endswith(']'):
+            if private_key.startswith('['):
                 key_array = [int(x.strip()) for x in private_key[1:-1].split(',')]
                 keypair = Keypair.from_bytes(bytes(key_array))
-            else:
-                # Try decoding from base64 first if it looks like base64
-                if all(c in '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz+/=' for c in private_key):
-                    import base64
-                    try:
-                        decoded = base64.b64decode(private_key)
-                        keypair = Keypair.from_bytes(decoded)
-                    except:
-                        # If base64 fails, try base58
-                        keypair = Keypair.from_base58_string(private_key)
-                else:
+            elif private_key.endswith('=') or '+' in private_key or '/' in private_key:
+                # Padding and '+'/'/' only occur in base64, never in base58
+                try:
+                    keypair = Keypair.from_bytes(base64.b64decode(private_key))
+                except ValueError:
                     keypair = Keypair.from_base58_string(private_key)
+            else:
+                keypair = Keypair.from_base58_string(private_key)
                     
             logger.info(f"Successfully loaded payer keypair with public key: {keypair.pubkey()}")
+            self._payer_keypair = keypair
             return keypair
         except Exception as e:
             logger.error(f"Failed to load payer keypair: {e}")
             raise
     
-    def get_solana_rpc_client(self) -> Client:
-        """Get RPC client"""
-        return Client(self._config['env']['helius']['rpc_url'])
+    @functools.cached_property
+    def rpc_http_session(self) -> httpx.Client:
+        """Connection pool shared by every synchronous RPC client"""
+        return httpx.Client(timeout=RPC_TIMEOUT, limits=RPC_HTTP_LIMITS, http2=RPC_HTTP2)
+
+    def get_solana_rpc_client(self, rpc_url: Optional[str] = None) -> Client:
+        """Get RPC client, for the Helius RPC URL unless another endpoint is given"""
+        client = Client(rpc_url or self.cfg.env.helius.rpc_url, timeout=RPC_TIMEOUT)
+        client._provider.session.close()
+        client._provider.session = self.rpc_http_session
+        return client
+
+    def get_solana_async_rpc_client(self, rpc_url: Optional[str] = None) -> AsyncClient:
+        """Get asynchronous RPC client, for the Helius RPC URL unless another endpoint is given"""
+        client = AsyncClient(rpc_url or self.cfg.env.helius.rpc_url, timeout=RPC_TIMEOUT)
+        _close_async_session(client._provider.session)
+        client._provider.session = httpx.AsyncClient(timeout=RPC_TIMEOUT, limits=RPC_HTTP_LIMITS, http2=RPC_HTTP2)
+        return client
 
     def get_unit_budget(self) -> int:
         """Get unit budget"""
-        return self._config['solana']['unit_budget']
+        return self.cfg.solana.unit_budget
 
     def get_unit_price(self) -> int:
         """Get unit price"""
-        return self._config['solana']['unit_price']
+        return self.cfg.solana.unit_price
+
+    @property
+    def DYNAMIC_FEES(self) -> bool:
+        """Whether to size compute budget per swap instead of using unit budget/price"""
+        return bool(self.get('solana.dynamic_fees', False))
 
-    # Constants getters
     @property
+    def TOKEN_BATCH(self) -> bool:
+        """Whether the token program accepts p-token batch instructions"""
+        return bool(self.get('solana.token_batch', False))
+
+    @property
+    def COALESCE_REQUESTS(self) -> bool:
+        """Whether concurrent RPC calls on the shared client are sent as JSON-RPC batches"""
+        return bool(self.get('solana.coalesce_requests', True))
+
+    @property
+    def SEND_ENDPOINTS(self) -> List[str]:
+        """Extra RPC URLs that every signed transaction is also sent to"""
+        return list(self.get('solana.send_endpoints') or [])
+
+    # Constants getters
+    @functools.cached_property
     def RAYDIUM_AMM_V4(self) -> Pubkey:
         """Get Raydium AMM V4 program ID"""
-        return Pubkey.from_string(self._config['programs']['raydium']['amm_v4'])
+        return _pk(self.cfg.programs.raydium.amm_v4)
     
     @property
     def DEFAULT_QUOTE_MINT(self) -> str:
         """Get default quote mint address"""
-        return self._config['tokens']['default_quote_mint']
+        return self.cfg.tokens.default_quote_mint
     
-    @property
+    @functools.cached_property
     def TOKEN_PROGRAM_ID(self) -> Pubkey:
         """Get token program ID"""
-        return Pubkey.from_string(self._config['programs']['token']['program_id'])
+        return _pk(self.cfg.programs.token.program_id)
     
-    @property
+    @functools.cached_property
     def TOKEN_2022_PROGRAM_ID(self) -> Pubkey:
         """Get token 2022 program ID"""
-        return Pubkey.from_string(self._config['programs']['token']['program_id_2022'])
+        return _pk(self.cfg.programs.token.program_id_2022)
     
-    @property
+    @functools.cached_property
     def MEMO_PROGRAM_V2(self) -> Pubkey:
         """Get memo program v2 ID"""
-        return Pubkey.from_string(self._config['programs']['memo']['v2'])
+        return _pk(self.cfg.programs.memo.v2)
     
     @property
     def ACCOUNT_LAYOUT_LEN(self) -> int:
         """Get account layout length"""
-        return self._config['constants']['account_layout_len']
+        return self.cfg.constants.account_layout_len
     
-    @property
+    @functools.cached_property
     def WSOL(self) -> Pubkey:
         """Get WSOL address"""
-        return Pubkey.from_string(self._config['tokens']['wsol']['address'])
+        return _pk(self.cfg.tokens.wsol.address)
     
     @property
     def SOL_DECIMAL(self) -> int:
         """Get SOL decimal"""
-        return self._config['tokens']['wsol']['decimal']
+        return self.cfg.tokens.wsol.decimal
 
-    @property
+    @functools.cached_property
     def RAY_AUTHORITY_V4(self) -> Pubkey:
         """Get Raydium Authority V4 address"""
-        return Pubkey.from_string(self._config['programs']['raydium']['ray_authority_v4'])
+        return _pk(self.cfg.programs.raydium.ray_authority_v4)
     
-    @property
+    @functools.cached_property
     def OPENBOOK_PROGRAM_ID(self) -> Pubkey:
         """Get OpenBook program ID"""
-        return Pubkey.from_string(self._config['programs']['openbook']['program_id'])
+        return _pk(self.cfg.programs.openbook.program_id)
+
+# Singleton instance, created on first use
+_config_singleton = None
+_config_lock = threading.Lock()
+
+def get_config() -> Config:
+    """Get the shared Config instance, creating it on first call"""
+    global _config_singleton
+    if _config_singleton is None:
+        with _config_lock:
+            if _config_singleton is None:
+                _config_singleton = Config()
+    return _config_singleton
 
-# Create a singleton instance
-config = Config()
+def __getattr__(name: str) -> Any:
+    """Resolve the legacy module-level `config` attribute lazily"""
+    if name == 'config':
+        return get_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
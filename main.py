@@ -3,8 +3,18 @@
 Example script demonstrating how to use the Raydium API
 """
 
+import logging
+
 from model.raydium_v4 import RaydiumV4
 
+def setup_logging(level: int = logging.INFO):
+    """Configure root logging for the example script"""
+    logging.basicConfig(
+        level=level,
+        format='%(asctime)s - %(levelname)s - [Raydium V4] %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
 def main():
     # Initialize the Raydium client
     raydium = RaydiumV4()
@@ -31,4 +41,5 @@ def main():
     print(f"Sell transaction successful: {success}")
 
 if __name__ == "__main__":
+    setup_logging()
     main()
\ No newline at end of file
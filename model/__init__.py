@@ -4,14 +4,18 @@ Raydium API client for interacting with Raydium DEX on Solana blockchain.
 
 from .raydium_v4 import RaydiumV4
 from .raydium_api import RaydiumAPI
+from .raydium_api_async import RaydiumAPIAsync
 from .solana_provider import SolanaProvider
+from .async_solana_provider import AsyncSolanaProvider
 from .solana_token_provider import SolanaTokenProvider
 from .solana_transaction_provider import SolanaTransactionProvider
 
 __all__ = [
     'RaydiumV4',
     'RaydiumAPI',
+    'RaydiumAPIAsync',
     'SolanaProvider',
+    'AsyncSolanaProvider',
     'SolanaTokenProvider',
     'SolanaTransactionProvider',
 ] 
\ No newline at end of file
@@ -0,0 +1,103 @@
+import json
+import threading
+from typing import Any, Tuple
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.core import RPCException
+from solders.keypair import Keypair
+from solders.rpc.responses import batch_from_json
+from config import get_config
+
+class AsyncSolanaProvider:
+    """
+    AsyncSolanaProvider class that encapsulates the asynchronous Solana RPC client.
+    Follows the singleton pattern to ensure only one instance exists.
+    """
+    _instance = None
+    _lock = threading.Lock()
+    
+    @classmethod
+    def get_instance(cls):
+        """
+        Get the singleton instance of the AsyncSolanaProvider class.
+        
+        Returns:
+            AsyncSolanaProvider: The singleton instance
+        """
+        # Double-checked so concurrent first calls share one client and HTTP pool
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+    
+    def __init__(self):
+        """
+        Initialize the AsyncSolanaProvider with configuration from Config class.
+        This should not be called directly - use get_instance() instead.
+        """
+        config = get_config()
+        self._client = config.get_solana_async_rpc_client()
+        self._payer = config.get_payer_keypair()
+    
+    @property
+    def rpc(self):
+        """
+        Get the asynchronous Solana RPC client.
+        
+        Returns:
+            AsyncClient: The asynchronous Solana RPC client
+        """
+        return self._client
+    
+    @property
+    def payer(self):
+        """
+        Get the payer keypair.
+        
+        Returns:
+            Keypair: The payer keypair
+        """
+        return self._payer
+    
+    async def batch(self, reqs: Tuple, parsers: Tuple) -> Tuple:
+        """
+        Send several RPC requests in a single JSON-RPC batch round-trip.
+        
+        Args:
+            reqs (Tuple): Request objects from solders.rpc.requests, each with a unique id
+            parsers (Tuple): Response classes from solders.rpc.responses, aligned with reqs
+            
+        Returns:
+            Tuple: Parsed responses in the same order as reqs
+            
+        Raises:
+            RPCException: If any request in the batch returned an RPC error
+        """
+        raw = await self._client._provider.make_batch_request_unparsed(reqs)
+        by_id = {resp["id"]: resp for resp in json.loads(raw)}
+        ordered = json.dumps([by_id[req.id] for req in reqs])
+        results = tuple(batch_from_json(ordered, parsers))
+        for result, parser in zip(results, parsers):
+            if not isinstance(result, parser):
+                raise RPCException(result)
+        return results
+
+    async def post_json(self, body: Any) -> Any:
+        """
+        Send a raw JSON-RPC request or batch to the RPC endpoint.
+        
+        Used for provider extensions, such as getPriorityFeeEstimate, that have no
+        typed request class.
+        
+        Args:
+            body (Any): JSON-RPC request object or list of request objects
+            
+        Returns:
+            Any: Decoded JSON-RPC response body
+        """
+        provider = self._client._provider
+        response = await provider.session.post(
+            content=json.dumps(body), **provider._build_common_request_kwargs()
+        )
+        response.raise_for_status()
+        return response.json()
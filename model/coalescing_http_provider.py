@@ -0,0 +1,172 @@
+import json
+import threading
+from typing import Any, List, Optional, Type
+
+import httpx
+from solana.exceptions import SolanaRpcException, handle_exceptions
+from solana.rpc.providers.core import _parse_raw
+from solana.rpc.providers.http import HTTPProvider
+
+
+class _QueuedRequest:
+    """A single JSON-RPC call waiting to be sent in a batch."""
+    __slots__ = ("body", "parser", "ready", "leader", "done", "result", "error")
+
+    def __init__(self, body: Any, parser: Type):
+        self.body = body
+        self.parser = parser
+        self.ready = threading.Event()
+        self.leader = False
+        self.done = False
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class CoalescingHTTPProvider:
+    """
+    Wraps an HTTPProvider so concurrent make_request calls share JSON-RPC batches.
+
+    A call made while no request is in flight is sent at once, so a lone caller pays
+    no extra latency. Calls that arrive while a request is in flight queue up and
+    are sent together, as one JSON-RPC array, as soon as it returns. Everything else
+    is delegated to the wrapped provider.
+    """
+
+    def __init__(self, provider: HTTPProvider, max_batch_size: int = 100):
+        """
+        Initialize the coalescing provider.
+
+        Args:
+            provider (HTTPProvider): Provider whose session and endpoint are used
+            max_batch_size (int): Maximum number of requests per JSON-RPC batch
+        """
+        self._provider = provider
+        self._max_batch_size = max_batch_size
+        self._lock = threading.Lock()
+        self._queue: List[_QueuedRequest] = []
+        self._sending = False
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._provider, name)
+
+    def make_request(self, body: Any, parser: Type) -> Any:
+        """
+        Send a JSON-RPC request, batched with any concurrent requests.
+
+        Args:
+            body (Any): Request object from solders.rpc.requests
+            parser (Type): Response class from solders.rpc.responses
+
+        Returns:
+            Any: Parsed response
+
+        Raises:
+            RPCException: If the RPC returned an error for this request
+            SolanaRpcException: If the HTTP request failed
+        """
+        request = _QueuedRequest(body, parser)
+        with self._lock:
+            self._queue.append(request)
+            if not self._sending:
+                self._sending = True
+                request.leader = True
+
+        if not request.leader:
+            request.ready.wait()
+        # Followers are woken either with their result or to send the next batch
+        if request.leader and not request.done:
+            self._send_next_batch()
+
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _send_next_batch(self) -> None:
+        """Send the queued requests, then hand the next batch to the first caller still waiting."""
+        with self._lock:
+            batch = self._queue[:self._max_batch_size]
+            del self._queue[:len(batch)]
+
+        sent = False
+        try:
+            try:
+                if len(batch) == 1:
+                    batch[0].result = self._provider.make_request(batch[0].body, batch[0].parser)
+                else:
+                    self._post_batch(batch)
+            except Exception as e:
+                for request in batch:
+                    if not request.done:
+                        request.error = e
+            sent = True
+        finally:
+            # Even if the send is interrupted (KeyboardInterrupt, SystemExit), release every
+            # waiter and hand over the queue, or later calls would block behind a dead leader
+            for request in batch:
+                if not sent and not request.done:
+                    request.error = RuntimeError("JSON-RPC batch send was interrupted")
+                request.done = True
+                request.ready.set()
+
+            with self._lock:
+                if self._queue:
+                    next_leader = self._queue[0]
+                    next_leader.leader = True
+                    next_leader.ready.set()
+                else:
+                    self._sending = False
+
+    @handle_exceptions(SolanaRpcException, httpx.HTTPError)
+    def _post_batch(self, batch: List[_QueuedRequest]) -> None:
+        """
+        Post requests as one JSON-RPC array and parse each response by id.
+
+        If the endpoint rejects the array (a 4xx other than 429, or a body that is not
+        a JSON array), the requests are sent one by one instead.
+
+        Args:
+            batch (List[_QueuedRequest]): Requests to send; each gets its result or error
+        """
+        payload = []
+        for i, request in enumerate(batch):
+            item = json.loads(request.body.to_json())
+            item["id"] = i
+            payload.append(item)
+
+        response = self._provider.session.post(
+            content=json.dumps(payload), **self._provider._build_common_request_kwargs()
+        )
+        if 400 <= response.status_code < 500 and response.status_code != 429:
+            self._send_each(batch)
+            return
+        response.raise_for_status()
+
+        try:
+            items = response.json()
+        except ValueError:
+            items = None
+        if not isinstance(items, list):
+            self._send_each(batch)
+            return
+
+        by_id = {item.get("id"): item for item in items if isinstance(item, dict)}
+        for i, request in enumerate(batch):
+            try:
+                request.result = _parse_raw(json.dumps(by_id[i]), parser=request.parser)
+            except Exception as e:
+                request.error = e
+            request.done = True
+
+    def _send_each(self, batch: List[_QueuedRequest]) -> None:
+        """
+        Send requests one at a time through the wrapped provider.
+
+        Args:
+            batch (List[_QueuedRequest]): Requests to send; each gets its result or error
+        """
+        for request in batch:
+            try:
+                request.result = self._provider.make_request(request.body, request.parser)
+            except Exception as e:
+                request.error = e
+            request.done = True
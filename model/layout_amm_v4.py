@@ -1,3 +1,6 @@
+import struct
+from typing import NamedTuple
+
 from construct import Bytes, Int32ul, Int8ul, Int64ul, Padding, BitsInteger, BitsSwapped, BitStruct, Const, Flag, BytesInteger
 from construct import Struct as cStruct
 
@@ -128,4 +131,66 @@ ACCOUNT_LAYOUT = cStruct(
     "delegated_amount" / Int64ul,
     "close_authority_option" / Int32ul,
     "close_authority" / PUBLIC_KEY_LAYOUT,
-)
\ No newline at end of file
+)
+
+# Swaps only need a few fields of the AMM and market accounts, so these are read
+# at fixed offsets with struct instead of building the full construct containers.
+# The offsets follow LIQUIDITY_STATE_LAYOUT_V4 and MARKET_STATE_LAYOUT_V3 above.
+
+class LiquidityStateV4Keys(NamedTuple):
+    coinDecimals: int
+    pcDecimals: int
+    poolCoinTokenAccount: bytes
+    poolPcTokenAccount: bytes
+    coinMintAddress: bytes
+    pcMintAddress: bytes
+    lpMintAddress: bytes
+    ammOpenOrders: bytes
+    serumMarket: bytes
+    serumProgramId: bytes
+    ammTargetOrders: bytes
+
+class MarketStateV3Keys(NamedTuple):
+    own_address: bytes
+    vault_signer_nonce: int
+    base_mint: bytes
+    quote_mint: bytes
+    base_vault: bytes
+    quote_vault: bytes
+    request_queue: bytes
+    event_queue: bytes
+    bids: bytes
+    asks: bytes
+
+_LIQUIDITY_STATE_V4_SIZE = LIQUIDITY_STATE_LAYOUT_V4.sizeof()
+_LIQUIDITY_STATE_V4_DECIMALS = struct.Struct("<QQ")
+_LIQUIDITY_STATE_V4_DECIMALS_OFFSET = 32
+_LIQUIDITY_STATE_V4_ACCOUNTS = struct.Struct("<" + "32s" * 9)
+_LIQUIDITY_STATE_V4_ACCOUNTS_OFFSET = 336
+
+_MARKET_STATE_V3_SIZE = MARKET_STATE_LAYOUT_V3.sizeof()
+_MARKET_STATE_V3_HEAD = struct.Struct("<32sQ32s32s32s")
+_MARKET_STATE_V3_HEAD_OFFSET = 13
+_MARKET_STATE_V3_QUOTE_VAULT = struct.Struct("<32s")
+_MARKET_STATE_V3_QUOTE_VAULT_OFFSET = 165
+_MARKET_STATE_V3_QUEUES = struct.Struct("<32s32s32s32s")
+_MARKET_STATE_V3_QUEUES_OFFSET = 221
+
+def parse_liquidity_state_v4_keys(data: bytes) -> LiquidityStateV4Keys:
+    """Read the decimals and account keys of an AMM v4 state account"""
+    if len(data) < _LIQUIDITY_STATE_V4_SIZE:
+        raise ValueError(f"AMM v4 state account too short: {len(data)} bytes")
+    return LiquidityStateV4Keys(
+        *_LIQUIDITY_STATE_V4_DECIMALS.unpack_from(data, _LIQUIDITY_STATE_V4_DECIMALS_OFFSET),
+        *_LIQUIDITY_STATE_V4_ACCOUNTS.unpack_from(data, _LIQUIDITY_STATE_V4_ACCOUNTS_OFFSET),
+    )
+
+def parse_market_state_v3_keys(data: bytes) -> MarketStateV3Keys:
+    """Read the nonce, mints, vaults and queues of an OpenBook market account"""
+    if len(data) < _MARKET_STATE_V3_SIZE:
+        raise ValueError(f"Market v3 state account too short: {len(data)} bytes")
+    return MarketStateV3Keys(
+        *_MARKET_STATE_V3_HEAD.unpack_from(data, _MARKET_STATE_V3_HEAD_OFFSET),
+        *_MARKET_STATE_V3_QUOTE_VAULT.unpack_from(data, _MARKET_STATE_V3_QUOTE_VAULT_OFFSET),
+        *_MARKET_STATE_V3_QUEUES.unpack_from(data, _MARKET_STATE_V3_QUEUES_OFFSET),
+    )
@@ -1,21 +1,53 @@
+import threading
+import ijson
 import requests
-from typing import Dict
+from cachetools import TTLCache
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+from typing import Dict, Iterator
 import logging
 
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    import json
+    json_loads = json.loads
+
 from model.api_provider import APIProvider
-from config import config
+from config import get_config
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# (connect, read) timeout in seconds for Raydium API requests
+REQUEST_TIMEOUT = (1.0, 3.0)
+
+# Pool metadata cache size and lifetime in seconds
+POOL_INFO_CACHE_SIZE = 1024
+POOL_INFO_CACHE_TTL = 30
+
 class RaydiumAPI(APIProvider):
     """Raydium API implementation."""
     
     def __init__(self):
         """Initialize RaydiumAPI with configuration."""
-        self.config = config
-        self.base_url = self.config.get("programs.raydium.api_v3_pools_info_url")
-        logger.info(f"Initialized RaydiumAPI with base URL: {self.base_url}")
+        self.config = get_config()
+        base_url = self.config.get("programs.raydium.api_v3_pools_info_url")
+        self.base_url = base_url if base_url.endswith("/") else f"{base_url}/"
+        self._ids_url = f"{self.base_url}ids"
+        self._mint_url = f"{self.base_url}mint"
+        
+        # Reuse connections across requests instead of a new handshake per call
+        self._session = requests.Session()
+        retries = Retry(total=2, backoff_factor=0.1, status_forcelist=(429, 500, 502, 503, 504))
+        self._session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retries))
+        
+        # Serve repeated lookups from memory; error responses are never cached
+        self._id_cache = TTLCache(maxsize=POOL_INFO_CACHE_SIZE, ttl=POOL_INFO_CACHE_TTL)
+        self._mint_cache = TTLCache(maxsize=POOL_INFO_CACHE_SIZE, ttl=POOL_INFO_CACHE_TTL)
+        self._cache_lock = threading.Lock()
+        logger.info("Initialized RaydiumAPI with base URL: %s", self.base_url)
     
     def get_pool_info_by_id(self, pool_id: str) -> Dict:
         """Get pool information by pool ID.
@@ -26,19 +58,27 @@ class RaydiumAPI(APIProvider):
         Returns:
             Dict: Pool information or error message
         """
-        IDS = "ids"
-        url = f"{self.base_url}{IDS}"
-        params = {IDS: pool_id}
+        with self._cache_lock:
+            cached = self._id_cache.get(pool_id)
+        if cached is not None:
+            return cached
+        
+        url = self._ids_url
+        params = (("ids", pool_id),)
         
         try:
-            logger.info(f"Fetching pool info for ID: {pool_id}")
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            error_msg = f"Failed to fetch pool info: {e}"
-            logger.error(error_msg)
-            return {"error": error_msg}
+            logger.info("Fetching pool info for ID: %s", pool_id)
+            response = self._session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+            if response.status_code >= 400:
+                logger.warning("Pool info request failed with status %d", response.status_code)
+                return {"error": True, "status": response.status_code}
+            result = json_loads(response.content)
+            with self._cache_lock:
+                self._id_cache[pool_id] = result
+            return result
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.warning("Failed to fetch pool info: %s", e)
+            return {"error": True, "reason": str(e)}
     
     def get_pool_info_by_mint(
         self,
@@ -62,22 +102,89 @@ class RaydiumAPI(APIProvider):
         Returns:
             Dict: Pool information or error message
         """
-        url = f"{self.base_url}mint"
-        params = {
-            "mint1": mint,
-            "poolType": pool_type,
-            "poolSortField": sort_field,
-            "sortType": sort_type,
-            "pageSize": page_size,
-            "page": page
-        }
+        cache_key = (mint, pool_type, sort_field, sort_type, page_size, page)
+        with self._cache_lock:
+            cached = self._mint_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        url = self._mint_url
+        params = (
+            ("mint1", mint),
+            ("poolType", pool_type),
+            ("poolSortField", sort_field),
+            ("sortType", sort_type),
+            ("pageSize", page_size),
+            ("page", page)
+        )
+        
+        try:
+            logger.info("Fetching pool info for mint: %s", mint)
+            response = self._session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+            if response.status_code >= 400:
+                logger.warning("Pool info request failed with status %d", response.status_code)
+                return {"error": True, "status": response.status_code}
+            result = json_loads(response.content)
+            with self._cache_lock:
+                self._mint_cache[cache_key] = result
+            return result
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.warning("Failed to fetch pool info: %s", e)
+            return {"error": True, "reason": str(e)}
+    
+    def iter_pools_by_mint(
+        self,
+        mint: str,
+        pool_type: str = "all",
+        sort_field: str = "default",
+        sort_type: str = "desc",
+        page_size: int = 100,
+        page: int = 1
+    ) -> Iterator[Dict]:
+        """Stream pools for a mint address as they are decoded.
+        
+        Pools are parsed incrementally from the response body, so callers that
+        only need the first few results can stop early without decoding the
+        rest of the page. Results are not cached.
+        
+        Args:
+            mint (str): The mint address to query
+            pool_type (str, optional): Type of pool. Defaults to "all".
+            sort_field (str, optional): Field to sort by. Defaults to "default".
+            sort_type (str, optional): Sort direction. Defaults to "desc".
+            page_size (int, optional): Number of results per page. Defaults to 100.
+            page (int, optional): Page number. Defaults to 1.
+            
+        Yields:
+            Dict: Pool information, one pool at a time
+        """
+        params = (
+            ("mint1", mint),
+            ("poolType", pool_type),
+            ("poolSortField", sort_field),
+            ("sortType", sort_type),
+            ("pageSize", page_size),
+            ("page", page)
+        )
         
         try:
-            logger.info(f"Fetching pool info for mint: {mint}")
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            error_msg = f"Failed to fetch pool info: {e}"
-            logger.error(error_msg)
-            return {"error": error_msg} 
\ No newline at end of file
+            logger.info("Streaming pool info for mint: %s", mint)
+            with self._session.get(self._mint_url, params=params, timeout=REQUEST_TIMEOUT, stream=True) as response:
+                if response.status_code >= 400:
+                    logger.warning("Pool info stream failed with status %d", response.status_code)
+                    return
+                response.raw.decode_content = True
+                yield from ijson.items(response.raw, "data.data.item", use_float=True)
+        except (requests.exceptions.RequestException, ijson.JSONError) as e:
+            logger.warning("Failed to stream pool info: %s", e)
+    
+    def invalidate(self, key: str) -> None:
+        """Drop cached pool information for a mint or pool ID.
+        
+        Args:
+            key (str): The mint address or pool ID to evict
+        """
+        with self._cache_lock:
+            self._id_cache.pop(key, None)
+            for cache_key in [k for k in self._mint_cache if k[0] == key]:
+                self._mint_cache.pop(cache_key, None)
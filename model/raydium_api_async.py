@@ -0,0 +1,145 @@
+import asyncio
+import httpx
+from cachetools import TTLCache
+from typing import Dict, List
+import logging
+
+from config import RPC_HTTP2, get_config
+from model.raydium_api import json_loads, POOL_INFO_CACHE_SIZE, POOL_INFO_CACHE_TTL
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class RaydiumAPIAsync:
+    """Asynchronous Raydium API implementation for concurrent pool lookups."""
+
+    def __init__(self):
+        """Initialize RaydiumAPIAsync with configuration."""
+        self.config = get_config()
+        base_url = self.config.get("programs.raydium.api_v3_pools_info_url")
+        self.base_url = base_url if base_url.endswith("/") else f"{base_url}/"
+        self._ids_url = f"{self.base_url}ids"
+        self._mint_url = f"{self.base_url}mint"
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(3.0),
+            limits=httpx.Limits(max_connections=32),
+            http2=RPC_HTTP2
+        )
+
+        # Serve repeated lookups from memory; error responses are never cached
+        self._id_cache = TTLCache(maxsize=POOL_INFO_CACHE_SIZE, ttl=POOL_INFO_CACHE_TTL)
+        self._mint_cache = TTLCache(maxsize=POOL_INFO_CACHE_SIZE, ttl=POOL_INFO_CACHE_TTL)
+        logger.info("Initialized RaydiumAPIAsync with base URL: %s", self.base_url)
+
+    async def aclose(self) -> None:
+        """Close the underlying HTTP client."""
+        await self._client.aclose()
+
+    async def __aenter__(self) -> "RaydiumAPIAsync":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def get_pool_info_by_id(self, pool_id: str) -> Dict:
+        """Get pool information by pool ID.
+
+        Args:
+            pool_id (str): The pool ID to query
+
+        Returns:
+            Dict: Pool information or error message
+        """
+        cached = self._id_cache.get(pool_id)
+        if cached is not None:
+            return cached
+
+        url = self._ids_url
+        params = (("ids", pool_id),)
+
+        try:
+            logger.info("Fetching pool info for ID: %s", pool_id)
+            response = await self._client.get(url, params=params)
+            if response.status_code >= 400:
+                logger.warning("Pool info request failed with status %d", response.status_code)
+                return {"error": True, "status": response.status_code}
+            result = json_loads(response.content)
+            self._id_cache[pool_id] = result
+            return result
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning("Failed to fetch pool info: %s", e)
+            return {"error": True, "reason": str(e)}
+
+    async def get_pool_info_by_mint(
+        self,
+        mint: str,
+        pool_type: str = "all",
+        sort_field: str = "default",
+        sort_type: str = "desc",
+        page_size: int = 100,
+        page: int = 1
+    ) -> Dict:
+        """Get pool information by mint address.
+
+        Args:
+            mint (str): The mint address to query
+            pool_type (str, optional): Type of pool. Defaults to "all".
+            sort_field (str, optional): Field to sort by. Defaults to "default".
+            sort_type (str, optional): Sort direction. Defaults to "desc".
+            page_size (int, optional): Number of results per page. Defaults to 100.
+            page (int, optional): Page number. Defaults to 1.
+
+        Returns:
+            Dict: Pool information or error message
+        """
+        cache_key = (mint, pool_type, sort_field, sort_type, page_size, page)
+        cached = self._mint_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        url = self._mint_url
+        params = (
+            ("mint1", mint),
+            ("poolType", pool_type),
+            ("poolSortField", sort_field),
+            ("sortType", sort_type),
+            ("pageSize", page_size),
+            ("page", page)
+        )
+
+        try:
+            logger.info("Fetching pool info for mint: %s", mint)
+            response = await self._client.get(url, params=params)
+            if response.status_code >= 400:
+                logger.warning("Pool info request failed with status %d", response.status_code)
+                return {"error": True, "status": response.status_code}
+            result = json_loads(response.content)
+            self._mint_cache[cache_key] = result
+            return result
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning("Failed to fetch pool info: %s", e)
+            return {"error": True, "reason": str(e)}
+
+    def invalidate(self, key: str) -> None:
+        """Drop cached pool information for a mint or pool ID.
+
+        Args:
+            key (str): The mint address or pool ID to evict
+        """
+        self._id_cache.pop(key, None)
+        for cache_key in [k for k in self._mint_cache if k[0] == key]:
+            self._mint_cache.pop(cache_key, None)
+
+    async def get_many(self, mints: List[str], **kwargs) -> List[Dict]:
+        """Get pool information for several mints concurrently.
+
+        Args:
+            mints (List[str]): The mint addresses to query
+            **kwargs: Extra arguments forwarded to get_pool_info_by_mint
+
+        Returns:
+            List[Dict]: Pool information or error message per mint, in input order
+        """
+        return await asyncio.gather(
+            *(self.get_pool_info_by_mint(mint, **kwargs) for mint in mints)
+        )
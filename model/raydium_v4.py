@@ -1,295 +1,1064 @@
-import base64
-import os
+import json
+import time
+import asyncio
 import logging
-from typing import Optional, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from functools import cached_property
+from itertools import repeat
+from typing import Dict, Generator, List, Optional, Sequence, Set, Tuple
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - [Raydium V4] %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
 logger = logging.getLogger(__name__)
 
 # Solana imports
+from solana.rpc.async_api import AsyncClient
 from solana.rpc.commitment import Processed
-from solana.rpc.types import TokenAccountOpts, TxOpts
+from solana.rpc.types import TxOpts
+from solders.account_decoder import UiAccountEncoding  # type: ignore
+from solders.commitment_config import CommitmentLevel  # type: ignore
 from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price  # type: ignore
+from solders.instruction import Instruction  # type: ignore
 from solders.message import MessageV0  # type: ignore
+from solders.hash import Hash  # type: ignore
 from solders.pubkey import Pubkey  # type: ignore
-from solders.system_program import (
-    CreateAccountWithSeedParams,
-    create_account_with_seed,
+from solders.rpc.config import RpcAccountInfoConfig, RpcSimulateTransactionConfig  # type: ignore
+from solders.rpc.requests import (  # type: ignore
+    GetAccountInfo,
+    GetLatestBlockhash,
+    GetMultipleAccounts,
+    SimulateVersionedTransaction,
+)
+from solders.rpc.responses import (  # type: ignore
+    GetAccountInfoResp,
+    GetLatestBlockhashResp,
+    GetMultipleAccountsResp,
+    SimulateTransactionResp,
 )
+from solders.signature import Signature  # type: ignore
+from solders.system_program import TransferParams, transfer
 from solders.transaction import VersionedTransaction  # type: ignore
 
 # SPL Token imports
-from spl.token.client import Token
 from spl.token.instructions import (
     CloseAccountParams,
-    InitializeAccountParams,
+    SyncNativeParams,
     close_account,
     create_associated_token_account,
+    create_idempotent_associated_token_account,
     get_associated_token_address,
-    initialize_account,
+    sync_native,
 )
 
 # Local imports
-from utils.common_utils import confirm_txn, get_token_balance
+from utils.common_utils import confirm_txn, confirm_txn_async
 from utils.pool_utils import (
+    AMM_V4_FEE_BPS,
     AmmV4PoolKeys,
-    fetch_amm_v4_pool_keys,
-    get_amm_v4_reserves,
+    amm_v4_out,
+    amm_v4_reserves_from_balances,
+    cache_amm_v4_pool_keys,
+    decode_amm_v4_pool_keys,
+    get_cached_amm_v4_pool_keys,
+    get_scanned_amm_v4_account_data,
+    invalidate_pool,
     make_amm_v4_swap_instruction,
+    pubkey_from_string,
     get_amm_v4_pair_from_rpc,
+    token_account_amount,
 )
-from config import config
+from model.layout_amm_v4 import parse_liquidity_state_v4_keys
+from config import get_config
 from model.solana_provider import SolanaProvider
+from model.async_solana_provider import AsyncSolanaProvider
 from model.raydium_api import RaydiumAPI
 
 
+_BASE64_PROCESSED = RpcAccountInfoConfig(encoding=UiAccountEncoding.Base64, commitment=CommitmentLevel.Processed)
+_BASE64_ZSTD_PROCESSED = RpcAccountInfoConfig(encoding=UiAccountEncoding.Base64Zstd, commitment=CommitmentLevel.Processed)
+
+# Latest blockhash, as (monotonic fetch time, blockhash). Blockhashes stay valid for
+# ~150 slots (~60 s), so one is reused for BLOCKHASH_MAX_AGE seconds. Messages compiled
+# against it are tracked so an identical swap is never signed twice.
+BLOCKHASH_MAX_AGE = 30.0
+_BLOCKHASH_CACHE: Optional[Tuple[float, Hash]] = None
+_BLOCKHASH_MESSAGES: Set[bytes] = set()
+_BLOCKHASH_LOCK = threading.Lock()
+
+# Raw reserves per pair, as (context slot, monotonic fetch time, base, quote, token decimal).
+# Reused only while the estimated slot age stays within MAX_RESERVE_AGE_SLOTS.
+MAX_RESERVE_AGE_SLOTS = 2
+SLOT_DURATION = 0.4
+_RESERVES_CACHE: Dict[str, Tuple[int, float, int, int, int]] = {}
+
+# Headroom over simulated compute units when sizing the compute unit limit
+COMPUTE_UNIT_MARGIN = 1.1
+# Instruction discriminator of the p-token batch instruction
+TOKEN_BATCH_DISCRIMINATOR = 255
+
+_SIMULATE_CONFIG = RpcSimulateTransactionConfig(
+    sig_verify=False, replace_recent_blockhash=True, commitment=CommitmentLevel.Processed
+)
+
+# Swaps are sent without preflight and without RPC-side retries; they are
+# rebroadcast to every send endpoint while confirmation is pending instead
+_RAW_SEND_OPTS = TxOpts(skip_preflight=True, max_retries=0)
+_SEND_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="raydium-send")
+
+
+@dataclass
+class SwapPrefetch:
+    """On-chain state needed to build a swap, fetched in batched RPC round-trips."""
+    pool_keys: AmmV4PoolKeys
+    mint: Pubkey
+    base_reserve: int
+    quote_reserve: int
+    token_decimal: int
+    token_account: Pubkey
+    token_balance: Optional[int]
+    blockhash: Hash
+    wsol_balance: Optional[int]
+
+
 class RaydiumV4:
     """
     RaydiumV4 class for handling Raydium V4 AMM operations.
     Provides functionality for buying and selling tokens using Raydium V4 pools.
     """
 
-    def __init__(self, solana_provider: Optional[SolanaProvider] = None):
+    def __init__(
+        self,
+        solana_provider: Optional[SolanaProvider] = None,
+        async_solana_provider: Optional[AsyncSolanaProvider] = None
+    ):
         """
         Initialize RaydiumV4 instance.
         
         Args:
             solana_provider (Optional[SolanaProvider]): Custom Solana provider instance.
                                                       If None, uses default provider.
+            async_solana_provider (Optional[AsyncSolanaProvider]): Custom async Solana provider
+                                                      instance. If None, uses default provider.
         """
         # Initialize providers
         self._provider = solana_provider or SolanaProvider.get_instance()
         self._client = self._provider.rpc
+        # The async provider and senders are only built when an *_async method first needs them
+        self._async_solana_provider = async_solana_provider
         self._payer = self._provider.payer
+        self._payer_pubkey = self._payer.pubkey()
         self._api = RaydiumAPI()
 
         # Constants from config
+        config = get_config()
         self._wsol = config.WSOL
         self._sol_decimal = config.SOL_DECIMAL
         self._account_layout_len = config.ACCOUNT_LAYOUT_LEN
         self._token_program_id = config.TOKEN_PROGRAM_ID
+        self._wsol_ata = get_associated_token_address(self._payer_pubkey, self._wsol)
         self._unit_budget = config.get_unit_budget()
         self._unit_price = config.get_unit_price()
+        self._dynamic_fees = config.DYNAMIC_FEES
+        self._token_batch = config.TOKEN_BATCH
+        self._senders = [self._client, *(config.get_solana_rpc_client(url) for url in config.SEND_ENDPOINTS)]
+
+    @cached_property
+    def _async_provider(self) -> AsyncSolanaProvider:
+        """Async Solana provider, the one given to __init__ or the shared default."""
+        return self._async_solana_provider or AsyncSolanaProvider.get_instance()
+
+    @cached_property
+    def _async_client(self) -> AsyncClient:
+        """Async RPC client of the async provider."""
+        return self._async_provider.rpc
+
+    @cached_property
+    def _async_senders(self) -> List[AsyncClient]:
+        """Async RPC clients that each raw transaction is sent through."""
+        return [
+            self._async_client,
+            *(get_config().get_solana_async_rpc_client(url) for url in get_config().SEND_ENDPOINTS),
+        ]
 
     @staticmethod
-    def calculate_minimum_amount_out(amount_out: float, slippage: int, decimal: int) -> int:
+    def calculate_minimum_amount_out(amount_out: int, slippage: int) -> int:
         """
         Calculate minimum amount out with slippage adjustment.
         
         Args:
-            amount_out (float): The estimated output amount
+            amount_out (int): The estimated output amount in base units
             slippage (int): Slippage percentage
-            decimal (int): Decimal places for the output amount (or the decimal multiplier itself)
         
         Returns:
-            int: Minimum amount out with slippage adjustment
+            int: Minimum amount out in base units
         """
-        logger = logging.getLogger(__name__)
-        logger.info(f"Calculating minimum amount out with slippage {slippage}%")
-        
-        # Apply slippage adjustment
-        slippage_adjustment = 1 - (slippage / 100)
-        logger.info(f"Slippage adjustment: {slippage_adjustment}")
-        
-        amount_out_with_slippage = amount_out * slippage_adjustment
-        logger.info(f"Amount out with slippage: {amount_out_with_slippage}")
-        
-        # Handle both decimal places (e.g., 9) and multipliers (e.g., 1000000000)
-        if decimal > 100:  # It's a multiplier
-            logger.info(f"Using direct multiplication with decimal: {decimal}")
-            result = int(amount_out_with_slippage * decimal)
-        else:  # It's decimal places
-            logger.info(f"Using power of 10^{decimal} for calculation")
-            result = int(amount_out_with_slippage * (10 ** decimal))
-        
-        logger.info(f"Final minimum amount out: {result}")
+        result = amount_out * (100 - slippage) // 100
+        logger.info("Minimum amount out with %s%% slippage: %s", slippage, result)
         return result
 
     @staticmethod
-    def sol_for_tokens(sol_amount: float, base_vault_balance: float, quote_vault_balance: float, swap_fee: float = 0.25) -> float:
+    def sol_for_tokens(sol_lamports: int, base_reserve_raw: int, quote_reserve_raw: int, fee_bps: int = AMM_V4_FEE_BPS) -> int:
         """
         Calculate the number of tokens received for a given SOL amount.
         
+        Mirrors the on-chain integer math: the fee is taken from the input, then the
+        constant product is applied with a multiply-then-floor-divide.
+        
         Args:
-            sol_amount (float): Amount of SOL to swap
-            base_vault_balance (float): Current base vault balance
-            quote_vault_balance (float): Current quote vault balance
-            swap_fee (float): Swap fee percentage
+            sol_lamports (int): Amount of SOL to swap, in lamports
+            base_reserve_raw (int): Current token reserve, in token base units
+            quote_reserve_raw (int): Current SOL reserve, in lamports
+            fee_bps (int): Swap fee in basis points
             
         Returns:
-            float: Expected amount of tokens to receive
+            int: Expected amount of tokens to receive, in token base units
         """
-        effective_sol_used = sol_amount - (sol_amount * (swap_fee / 100))
-        constant_product = base_vault_balance * quote_vault_balance
-        updated_base_vault_balance = constant_product / (quote_vault_balance + effective_sol_used)
-        tokens_received = base_vault_balance - updated_base_vault_balance
-        return round(tokens_received, 9)
+        return amm_v4_out(sol_lamports, quote_reserve_raw, base_reserve_raw, fee_bps)
 
     @staticmethod
-    def tokens_for_sol(token_amount: float, base_vault_balance: float, quote_vault_balance: float, swap_fee: float = 0.25) -> float:
+    def tokens_for_sol(token_amount_raw: int, base_reserve_raw: int, quote_reserve_raw: int, fee_bps: int = AMM_V4_FEE_BPS) -> int:
         """
         Calculate the amount of SOL received for a given token amount.
         
         Args:
-            token_amount (float): Amount of tokens to swap
-            base_vault_balance (float): Current base vault balance
-            quote_vault_balance (float): Current quote vault balance
-            swap_fee (float): Swap fee percentage
+            token_amount_raw (int): Amount of tokens to swap, in token base units
+            base_reserve_raw (int): Current token reserve, in token base units
+            quote_reserve_raw (int): Current SOL reserve, in lamports
+            fee_bps (int): Swap fee in basis points
             
         Returns:
-            float: Expected amount of SOL to receive
+            int: Expected amount of SOL to receive, in lamports
         """
-        effective_tokens_sold = token_amount * (1 - (swap_fee / 100))
-        constant_product = base_vault_balance * quote_vault_balance
-        updated_quote_vault_balance = constant_product / (base_vault_balance + effective_tokens_sold)
-        sol_received = quote_vault_balance - updated_quote_vault_balance
-        return round(sol_received, 9)
+        return amm_v4_out(token_amount_raw, base_reserve_raw, quote_reserve_raw, fee_bps)
 
-    def buy(self, pair_address: str, sol_in: float = 0.01, slippage: int = 5) -> bool:
+    @staticmethod
+    def sol_for_tokens_many(
+        sol_lamports: Sequence[int],
+        base_reserves_raw: Sequence[int],
+        quote_reserves_raw: Sequence[int],
+        fee_bps: int = AMM_V4_FEE_BPS
+    ) -> List[int]:
         """
-        Buy tokens using SOL.
+        Element-wise sol_for_tokens over equal-length sequences, for scanning many
+        pools or input sizes at once.
         
         Args:
-            pair_address (str): Address of the trading pair
-            sol_in (float): Amount of SOL to spend
-            slippage (int): Maximum acceptable slippage percentage
+            sol_lamports (Sequence[int]): Amounts of SOL to swap, in lamports
+            base_reserves_raw (Sequence[int]): Token reserve per quote, in base units
+            quote_reserves_raw (Sequence[int]): SOL reserve per quote, in lamports
+            fee_bps (int): Swap fee in basis points
             
         Returns:
-            bool: True if transaction successful, False otherwise
+            List[int]: Expected amount of tokens to receive per quote, in base units
         """
-        try:
-            logger.info(f"Initiating buy transaction for pair {pair_address} with {sol_in} SOL input and {slippage}% slippage")
+        return list(map(amm_v4_out, sol_lamports, quote_reserves_raw, base_reserves_raw, repeat(fee_bps)))
 
-            logger.info(f"Fetching AMM V4 pool keys for pair {pair_address}")
-            pool_keys: Optional[AmmV4PoolKeys] = fetch_amm_v4_pool_keys(pair_address)
-            if pool_keys is None:
-                logger.error(f"Failed to fetch pool keys for pair {pair_address}")
-                return False
-            logger.debug("Successfully retrieved pool keys")
+    @staticmethod
+    def tokens_for_sol_many(
+        token_amounts_raw: Sequence[int],
+        base_reserves_raw: Sequence[int],
+        quote_reserves_raw: Sequence[int],
+        fee_bps: int = AMM_V4_FEE_BPS
+    ) -> List[int]:
+        """
+        Element-wise tokens_for_sol over equal-length sequences, for scanning many
+        pools or input sizes at once.
+        
+        Args:
+            token_amounts_raw (Sequence[int]): Amounts of tokens to swap, in base units
+            base_reserves_raw (Sequence[int]): Token reserve per quote, in base units
+            quote_reserves_raw (Sequence[int]): SOL reserve per quote, in lamports
+            fee_bps (int): Swap fee in basis points
+            
+        Returns:
+            List[int]: Expected amount of SOL to receive per quote, in lamports
+        """
+        return list(map(amm_v4_out, token_amounts_raw, base_reserves_raw, quote_reserves_raw, repeat(fee_bps)))
 
-            mint = (
-                pool_keys.base_mint if pool_keys.base_mint != self._wsol else pool_keys.quote_mint
+    def _prefetch_steps(self, pair_address: str) -> Generator[Tuple[tuple, tuple], tuple, Optional[SwapPrefetch]]:
+        """
+        Plan the RPC batches for a swap prelude without performing any I/O.
+        
+        Yields (requests, parsers) batches and receives the parsed responses, so the
+        same logic drives both the sync and async clients. Pool keys are cached and
+        the blockhash is reused while it is younger than BLOCKHASH_MAX_AGE, so a
+        warm pair needs a single batch; a cold
+        pair needs one more, since the market and vaults are only known from the
+        AMM state, unless a pair scan already returned it. Vault balances are
+        skipped while the pair's cached reserves are at most MAX_RESERVE_AGE_SLOTS old.
+        
+        Args:
+            pair_address (str): Address of the trading pair
+            
+        Returns:
+            Optional[SwapPrefetch]: Swap prelude state, or None if the pool could not be loaded
+        """
+        global _BLOCKHASH_CACHE
+        
+        amm_id = pubkey_from_string(pair_address)
+        pool_keys = get_cached_amm_v4_pool_keys(pair_address)
+        # A pair scan may already have returned the AMM state, saving its fetch
+        amm_data = get_scanned_amm_v4_account_data(pair_address) if pool_keys is None else None
+        
+        blockhash = None
+        if _BLOCKHASH_CACHE is not None and time.monotonic() - _BLOCKHASH_CACHE[0] < BLOCKHASH_MAX_AGE:
+            blockhash = _BLOCKHASH_CACHE[1]
+        
+        reqs, parsers = [], []
+        if blockhash is None:
+            reqs.append(GetLatestBlockhash(id=len(reqs)))
+            parsers.append(GetLatestBlockhashResp)
+        if pool_keys is None and amm_data is None:
+            reqs.append(GetAccountInfo(amm_id, _BASE64_PROCESSED, id=len(reqs)))
+            parsers.append(GetAccountInfoResp)
+        else:
+            accounts, mint, token_account, reserves = self._swap_accounts(pair_address, pool_keys, amm_data)
+            reqs.append(GetMultipleAccounts(accounts, _BASE64_ZSTD_PROCESSED, id=len(reqs)))
+            parsers.append(GetMultipleAccountsResp)
+        
+        results = list((yield tuple(reqs), tuple(parsers)))
+        if blockhash is None:
+            blockhash = results.pop(0).value.blockhash
+            _BLOCKHASH_CACHE = (time.monotonic(), blockhash)
+            with _BLOCKHASH_LOCK:
+                _BLOCKHASH_MESSAGES.clear()
+        
+        if pool_keys is None and amm_data is None:
+            amm_account = results.pop(0).value
+            if amm_account is None:
+                logger.error("AMM account not found for pair %s", pair_address)
+                return None
+            
+            amm_data = amm_account.data
+            accounts, mint, token_account, reserves = self._swap_accounts(pair_address, None, amm_data)
+            (accounts_resp,) = yield (
+                (GetMultipleAccounts(accounts, _BASE64_ZSTD_PROCESSED, id=0),),
+                (GetMultipleAccountsResp,),
             )
-            logger.debug(f"Using mint address: {mint}")
+        else:
+            accounts_resp = results.pop(0)
+        
+        if pool_keys is None:
+            market_account, *vault_accounts, token_account_info, wsol_account_info = accounts_resp.value
+            pool_keys = decode_amm_v4_pool_keys(amm_id, amm_data, market_account.data)
+            cache_amm_v4_pool_keys(pair_address, pool_keys)
+        else:
+            *vault_accounts, token_account_info, wsol_account_info = accounts_resp.value
+        
+        if reserves is None:
+            base_account, quote_account = vault_accounts
+            reserves = amm_v4_reserves_from_balances(
+                pool_keys,
+                token_account_amount(base_account.data),
+                token_account_amount(quote_account.data),
+            )
+            _RESERVES_CACHE[pair_address] = (accounts_resp.context.slot, time.monotonic(), *reserves)
+        base_reserve, quote_reserve, token_decimal = reserves
+        token_balance = (
+            token_account_amount(token_account_info.data)
+            if token_account_info is not None else None
+        )
+        wsol_balance = (
+            token_account_amount(wsol_account_info.data)
+            if wsol_account_info is not None else None
+        )
+        
+        return SwapPrefetch(
+            pool_keys=pool_keys,
+            mint=mint,
+            base_reserve=base_reserve,
+            quote_reserve=quote_reserve,
+            token_decimal=token_decimal,
+            token_account=token_account,
+            token_balance=token_balance,
+            blockhash=blockhash,
+            wsol_balance=wsol_balance,
+        )
 
-            logger.info("Calculating swap amounts and reserves")
-            amount_in = int(sol_in * self._sol_decimal)
+    def _swap_accounts(
+        self,
+        pair_address: str,
+        pool_keys: Optional[AmmV4PoolKeys],
+        amm_data: Optional[bytes]
+    ) -> Tuple[List[Pubkey], Pubkey, Pubkey, Optional[Tuple[int, int, int]]]:
+        """
+        List the accounts a swap prelude reads in its getMultipleAccounts call.
+        
+        Without pool keys, the market and vaults are taken from the AMM state and the
+        market is fetched first; the vaults are skipped while cached reserves are fresh.
+        The payer's token ATA and WSOL ATA always come last.
+        
+        Args:
+            pair_address (str): Address of the trading pair
+            pool_keys (Optional[AmmV4PoolKeys]): Cached pool keys, if any
+            amm_data (Optional[bytes]): AMM account data, required when pool_keys is None
+            
+        Returns:
+            Tuple: Accounts to fetch, token mint, payer token ATA and cached reserves (or None)
+        """
+        if pool_keys is None:
+            amm_state = parse_liquidity_state_v4_keys(amm_data)
+            base_mint = Pubkey.from_bytes(amm_state.coinMintAddress)
+            mint = base_mint if base_mint != self._wsol else Pubkey.from_bytes(amm_state.pcMintAddress)
+            pool_accounts = [
+                Pubkey.from_bytes(amm_state.serumMarket),
+                Pubkey.from_bytes(amm_state.poolCoinTokenAccount),
+                Pubkey.from_bytes(amm_state.poolPcTokenAccount),
+            ]
+            reserves = None
+        else:
+            mint = pool_keys.base_mint if pool_keys.base_mint != self._wsol else pool_keys.quote_mint
+            reserves = self._cached_reserves(pair_address)
+            pool_accounts = [pool_keys.base_vault, pool_keys.quote_vault] if reserves is None else []
+        
+        token_account = get_associated_token_address(self._payer_pubkey, mint)
+        return [*pool_accounts, token_account, self._wsol_ata], mint, token_account, reserves
 
-            base_reserve, quote_reserve, token_decimal = get_amm_v4_reserves(pool_keys)
-            amount_out = self.sol_for_tokens(sol_in, base_reserve, quote_reserve)
-            logger.info(f"Estimated output amount: {amount_out} tokens (base_reserve: {base_reserve}, quote_reserve: {quote_reserve})")
+    @staticmethod
+    def _cached_reserves(pair_address: str) -> Optional[Tuple[int, int, int]]:
+        """
+        Get a pair's cached reserves if they are recent enough to quote against.
+        
+        Solana produces a slot roughly every SLOT_DURATION seconds, so the age of
+        the cached reserves in slots is estimated from the wall-clock time since
+        they were fetched, without an extra getSlot call.
+        
+        Args:
+            pair_address (str): Address of the trading pair
+            
+        Returns:
+            Optional[Tuple[int, int, int]]: Raw base reserve, quote reserve and token
+                decimal, or None if missing or stale
+        """
+        cached = _RESERVES_CACHE.get(pair_address)
+        if cached is None:
+            return None
+        slot, fetched_at, base_reserve, quote_reserve, token_decimal = cached
+        age_slots = (time.monotonic() - fetched_at) / SLOT_DURATION
+        if age_slots > MAX_RESERVE_AGE_SLOTS:
+            return None
+        logger.debug("Reusing reserves for pair %s from slot %s", pair_address, slot)
+        return base_reserve, quote_reserve, token_decimal
 
-            minimum_amount_out = self.calculate_minimum_amount_out(amount_out, slippage, token_decimal)
-            logger.info(f"Transaction parameters - Input: {amount_in} lamports, Minimum output: {minimum_amount_out} tokens")
+    def _prefetch(self, pair_address: str) -> Optional[SwapPrefetch]:
+        """
+        Fetch pool keys, reserves, payer token accounts and blockhash for a swap.
+        
+        Args:
+            pair_address (str): Address of the trading pair
+            
+        Returns:
+            Optional[SwapPrefetch]: Swap prelude state, or None if the pool could not be loaded
+        """
+        steps = self._prefetch_steps(pair_address)
+        try:
+            reqs, parsers = next(steps)
+            while True:
+                reqs, parsers = steps.send(self._provider.batch(reqs, parsers))
+        except StopIteration as done:
+            return done.value
 
-            logger.info("Checking for existing token account")
-            token_account_check = self._client.get_token_accounts_by_owner(
-                self._payer.pubkey(), TokenAccountOpts(mint), Processed
-            )
-            if token_account_check.value:
-                token_account = token_account_check.value[0].pubkey
-                create_token_account_instruction = None
-                logger.debug(f"Found existing token account: {token_account}")
-            else:
-                token_account = get_associated_token_address(self._payer.pubkey(), mint)
-                create_token_account_instruction = create_associated_token_account(
-                    self._payer.pubkey(), self._payer.pubkey(), mint
-                )
-                logger.info(f"Creating new associated token account: {token_account}")
+    async def _prefetch_async(self, pair_address: str) -> Optional[SwapPrefetch]:
+        """
+        Async counterpart of _prefetch, using the shared AsyncClient.
+        
+        Args:
+            pair_address (str): Address of the trading pair
+            
+        Returns:
+            Optional[SwapPrefetch]: Swap prelude state, or None if the pool could not be loaded
+        """
+        steps = self._prefetch_steps(pair_address)
+        try:
+            reqs, parsers = next(steps)
+            while True:
+                reqs, parsers = steps.send(await self._async_provider.batch(reqs, parsers))
+        except StopIteration as done:
+            return done.value
 
-            logger.debug("Generating random seed for WSOL account")
-            seed = base64.urlsafe_b64encode(os.urandom(24)).decode("utf-8")
-            wsol_token_account = Pubkey.create_with_seed(
-                self._payer.pubkey(), seed, self._token_program_id
-            )
-            balance_needed = Token.get_min_balance_rent_for_exempt_for_account(self._client)
-            logger.debug(f"WSOL account address: {wsol_token_account}, required balance: {balance_needed} lamports")
+    def _wsol_scaffold(
+        self,
+        amount_in_lamports: int,
+        need_funded: bool
+    ) -> Tuple[Pubkey, List[Instruction], Instruction]:
+        """
+        Build the WSOL account plumbing shared by buys and sells.
+        
+        Both directions swap through the payer's WSOL ATA, which is always created
+        idempotently, since a concurrent sell may close it after the prefetch saw it,
+        and for buys is funded and synced before the swap.
+        
+        Args:
+            amount_in_lamports (int): Lamports to wrap when need_funded is set
+            need_funded (bool): Whether to wrap SOL into the account before the swap
+            
+        Returns:
+            Tuple[Pubkey, List[Instruction], Instruction]: WSOL ATA, setup instructions
+                and the instruction that closes the ATA back to SOL
+        """
+        wsol_token_account = self._wsol_ata
+        setup_instructions = [create_idempotent_associated_token_account(
+            self._payer_pubkey, self._payer_pubkey, self._wsol
+        )]
 
-            logger.info("Creating and initializing temporary WSOL account")
-            create_wsol_account_instruction = create_account_with_seed(
-                CreateAccountWithSeedParams(
-                    from_pubkey=self._payer.pubkey(),
+        if need_funded:
+            logger.info("Wrapping %s lamports into WSOL account %s", amount_in_lamports, wsol_token_account)
+            setup_instructions.append(transfer(
+                TransferParams(
+                    from_pubkey=self._payer_pubkey,
                     to_pubkey=wsol_token_account,
-                    base=self._payer.pubkey(),
-                    seed=seed,
-                    lamports=int(balance_needed + amount_in),
-                    space=self._account_layout_len,
-                    owner=self._token_program_id,
+                    lamports=amount_in_lamports,
                 )
-            )
+            ))
+            setup_instructions.append(sync_native(
+                SyncNativeParams(program_id=self._token_program_id, account=wsol_token_account)
+            ))
 
-            init_wsol_account_instruction = initialize_account(
-                InitializeAccountParams(
-                    program_id=self._token_program_id,
-                    account=wsol_token_account,
-                    mint=self._wsol,
-                    owner=self._payer.pubkey(),
-                )
+        close_instruction = close_account(
+            CloseAccountParams(
+                program_id=self._token_program_id,
+                account=wsol_token_account,
+                dest=self._payer_pubkey,
+                owner=self._payer_pubkey,
             )
+        )
+        return wsol_token_account, setup_instructions, close_instruction
+
+    def _build_buy_instructions(self, prefetch: SwapPrefetch, sol_in: float, slippage: int) -> List[Instruction]:
+        """
+        Build the buy instructions, without compute budget, from prefetched swap state.
+        
+        Args:
+            prefetch (SwapPrefetch): Swap prelude state for the pair
+            sol_in (float): Amount of SOL to spend
+            slippage (int): Maximum acceptable slippage percentage
+            
+        Returns:
+            List[Instruction]: Swap instructions in execution order
+        """
+        pool_keys = prefetch.pool_keys
+        logger.debug("Successfully retrieved pool keys")
 
-            logger.info("Creating swap instructions")
-            swap_instruction = make_amm_v4_swap_instruction(
-                amount_in=amount_in,
-                minimum_amount_out=minimum_amount_out,
-                token_account_in=wsol_token_account,
-                token_account_out=token_account,
-                accounts=pool_keys,
-                owner=self._payer.pubkey(),
+        mint = prefetch.mint
+        logger.debug("Using mint address: %s", mint)
+
+        logger.info("Calculating swap amounts and reserves")
+        amount_in = int(sol_in * self._sol_decimal)
+
+        base_reserve, quote_reserve = prefetch.base_reserve, prefetch.quote_reserve
+        amount_out = self.sol_for_tokens(amount_in, base_reserve, quote_reserve)
+        logger.info("Estimated output amount: %s tokens (base_reserve: %s, quote_reserve: %s)", amount_out, base_reserve, quote_reserve)
+
+        minimum_amount_out = self.calculate_minimum_amount_out(amount_out, slippage)
+        logger.info("Transaction parameters - Input: %s lamports, Minimum output: %s tokens", amount_in, minimum_amount_out)
+
+        logger.info("Checking for existing token account")
+        token_account = prefetch.token_account
+        if prefetch.token_balance is not None:
+            create_token_account_instruction = None
+            logger.debug("Found existing token account: %s", token_account)
+        else:
+            create_token_account_instruction = create_associated_token_account(
+                self._payer_pubkey, self._payer_pubkey, mint
             )
+            logger.info("Creating new associated token account: %s", token_account)
+
+        # The swap spends all wrapped SOL, so the WSOL ATA is left open for the next buy
+        wsol_token_account, instructions, _ = self._wsol_scaffold(amount_in, need_funded=True)
+
+        if create_token_account_instruction:
+            instructions.append(create_token_account_instruction)
+
+        logger.info("Creating swap instructions")
+        instructions.append(make_amm_v4_swap_instruction(
+            amount_in=amount_in,
+            minimum_amount_out=minimum_amount_out,
+            token_account_in=wsol_token_account,
+            token_account_out=token_account,
+            accounts=pool_keys,
+            owner=self._payer_pubkey,
+        ))
+
+        return instructions
+
+    def _build_sell_instructions(self, prefetch: SwapPrefetch, percentage: int, slippage: int) -> Optional[List[Instruction]]:
+        """
+        Build the sell instructions, without compute budget, from prefetched swap state.
+        
+        Args:
+            prefetch (SwapPrefetch): Swap prelude state for the pair
+            percentage (int): Percentage of tokens to sell (1-100)
+            slippage (int): Maximum acceptable slippage percentage
+            
+        Returns:
+            Optional[List[Instruction]]: Swap instructions, or None if there is no balance to sell
+        """
+        pool_keys = prefetch.pool_keys
+        logger.debug("Successfully retrieved pool keys")
+
+        mint = prefetch.mint
+        logger.debug("Using mint address: %s", mint)
+
+        logger.info("Retrieving current token balance")
+        token_balance = prefetch.token_balance
+        logger.info("Current token balance: %s", token_balance)
+
+        if token_balance == 0 or token_balance is None:
+            logger.error("Insufficient token balance for sell transaction")
+            return None
+
+        amount_in = token_balance * percentage // 100
+        logger.info("Adjusted token balance for %s%% sell: %s", percentage, amount_in)
+
+        logger.info("Calculating swap amounts and reserves")
+        base_reserve, quote_reserve = prefetch.base_reserve, prefetch.quote_reserve
+        amount_out = self.tokens_for_sol(amount_in, base_reserve, quote_reserve)
+        logger.info("Estimated SOL output: %s (base_reserve: %s, quote_reserve: %s)", amount_out, base_reserve, quote_reserve)
+
+        minimum_amount_out = self.calculate_minimum_amount_out(amount_out, slippage)
+        logger.info("Transaction parameters - Input: %s tokens, Minimum output: %s lamports", amount_in, minimum_amount_out)
+        
+        token_account = prefetch.token_account
+        logger.debug("Using token account: %s", token_account)
+
+        wsol_token_account, instructions, close_wsol_account_instruction = self._wsol_scaffold(0, need_funded=False)
+
+        logger.info("Creating swap instructions")
+        swap_instruction = make_amm_v4_swap_instruction(
+            amount_in=amount_in,
+            minimum_amount_out=minimum_amount_out,
+            token_account_in=token_account,
+            token_account_out=wsol_token_account,
+            accounts=pool_keys,
+            owner=self._payer_pubkey,
+        )
 
+        instructions.append(swap_instruction)
+        # Closing the WSOL ATA unwraps the proceeds back to SOL. It is only closed when it
+        # held no WSOL before the sell, so WSOL the wallet already had is not unwrapped
+        close_wsol = not prefetch.wsol_balance
+        if close_wsol:
             logger.info("Preparing to close WSOL account after swap")
-            close_wsol_account_instruction = close_account(
+            instructions.append(close_wsol_account_instruction)
+        else:
+            logger.info("Keeping WSOL account open: it held %s lamports before the swap", prefetch.wsol_balance)
+
+        if percentage == 100:
+            logger.info("Preparing to close token account after swap")
+            close_token_account_instruction = close_account(
                 CloseAccountParams(
                     program_id=self._token_program_id,
-                    account=wsol_token_account,
-                    dest=self._payer.pubkey(),
-                    owner=self._payer.pubkey(),
+                    account=token_account,
+                    dest=self._payer_pubkey,
+                    owner=self._payer_pubkey,
                 )
             )
+            if self._token_batch and close_wsol:
+                # One p-token batch closes both accounts instead of two top-level ixs
+                instructions[-1] = self._build_batch_close([close_wsol_account_instruction, close_token_account_instruction])
+            else:
+                instructions.append(close_token_account_instruction)
 
-            instructions = [
-                set_compute_unit_limit(self._unit_budget),
-                set_compute_unit_price(self._unit_price),
-                create_wsol_account_instruction,
-                init_wsol_account_instruction,
-            ]
-
-            if create_token_account_instruction:
-                instructions.append(create_token_account_instruction)
+        return instructions
 
-            instructions.append(swap_instruction)
-            instructions.append(close_wsol_account_instruction)
+    def _build_batch_close(self, close_instructions: List[Instruction]) -> Instruction:
+        """
+        Pack token program instructions into a single p-token batch instruction.
+        
+        The batch data is the 0xFF discriminator followed, per sub-instruction, by
+        [number of accounts: u8][data length: u8][data]; the accounts of all
+        sub-instructions are concatenated in the same order.
+        
+        Args:
+            close_instructions (List[Instruction]): Token program instructions to combine
+            
+        Returns:
+            Instruction: Batch instruction for the token program
+        """
+        data = bytearray([TOKEN_BATCH_DISCRIMINATOR])
+        accounts = []
+        for ix in close_instructions:
+            data += bytes((len(ix.accounts), len(ix.data))) + ix.data
+            accounts.extend(ix.accounts)
+        return Instruction(self._token_program_id, bytes(data), accounts)
 
-            logger.info("Compiling transaction message")
+    def _compile_transaction(self, instructions: List[Instruction], blockhash: Hash, unit_limit: int, unit_price: int) -> VersionedTransaction:
+        """
+        Prepend the compute budget to swap instructions and sign the transaction.
+        
+        A swap identical to one already compiled against the same blockhash would
+        share its signature and be dropped as a duplicate, so its unit price is
+        raised by one micro-lamport until the message is unique.
+        
+        Args:
+            instructions (List[Instruction]): Swap instructions in execution order
+            blockhash (Hash): Recent blockhash for the transaction
+            unit_limit (int): Compute unit limit
+            unit_price (int): Compute unit price in micro-lamports
+            
+        Returns:
+            VersionedTransaction: Signed transaction ready to send
+        """
+        logger.info("Compiling transaction message")
+        while True:
             compiled_message = MessageV0.try_compile(
-                self._payer.pubkey(),
-                instructions,
+                self._payer_pubkey,
+                [set_compute_unit_limit(unit_limit), set_compute_unit_price(unit_price), *instructions],
                 [],
-                self._client.get_latest_blockhash().value.blockhash,
+                blockhash,
             )
+            message_bytes = bytes(compiled_message)
+            with _BLOCKHASH_LOCK:
+                if message_bytes not in _BLOCKHASH_MESSAGES:
+                    _BLOCKHASH_MESSAGES.add(message_bytes)
+                    break
+            unit_price += 1
+        return VersionedTransaction(compiled_message, [self._payer])
+
+    def _compute_budget_request(self, instructions: List[Instruction], prefetch: SwapPrefetch) -> List[dict]:
+        """
+        Build a JSON-RPC batch that simulates the swap and asks for a priority fee estimate.
+        
+        Args:
+            instructions (List[Instruction]): Swap instructions in execution order
+            prefetch (SwapPrefetch): Swap prelude state for the pair
+            
+        Returns:
+            List[dict]: simulateTransaction and getPriorityFeeEstimate request bodies
+        """
+        message = MessageV0.try_compile(self._payer_pubkey, instructions, [], prefetch.blockhash)
+        unsigned_txn = VersionedTransaction.populate(message, [Signature.default()])
+        simulate = SimulateVersionedTransaction(unsigned_txn, _SIMULATE_CONFIG, id=0)
+        return [
+            json.loads(simulate.to_json()),
+            {
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "getPriorityFeeEstimate",
+                "params": [{"accountKeys": [str(prefetch.pool_keys.amm_id)], "options": {"recommended": True}}],
+            },
+        ]
+
+    def _compute_budget_from_response(self, responses: List[dict]) -> Tuple[int, int]:
+        """
+        Size the compute budget from simulation and fee estimate results.
+        
+        Falls back to the configured unit budget and price for any part that failed.
+        
+        Args:
+            responses (List[dict]): Responses to the batch from _compute_budget_request
+            
+        Returns:
+            Tuple[int, int]: Compute unit limit and price in micro-lamports
+        """
+        by_id = {resp.get("id"): resp for resp in responses}
+        unit_limit, unit_price = self._unit_budget, self._unit_price
+
+        simulation = by_id.get(0, {})
+        if "result" in simulation:
+            result = SimulateTransactionResp.from_json(json.dumps(simulation)).value
+            if result.err is None and result.units_consumed:
+                unit_limit = int(result.units_consumed * COMPUTE_UNIT_MARGIN)
+            else:
+                logger.warning("Swap simulation failed, keeping unit budget %s: %s", unit_limit, result.err)
+        else:
+            logger.warning("Swap simulation request failed: %s", simulation.get('error'))
+
+        estimate = by_id.get(1, {}).get("result") or {}
+        if estimate.get("priorityFeeEstimate") is not None:
+            unit_price = int(estimate["priorityFeeEstimate"])
+        else:
+            logger.warning("No priority fee estimate, keeping unit price %s", unit_price)
+
+        logger.info("Compute budget: limit=%s, price=%s", unit_limit, unit_price)
+        return unit_limit, unit_price
+
+    def _compute_budget(self, instructions: List[Instruction], prefetch: SwapPrefetch) -> Tuple[int, int]:
+        """
+        Pick the compute unit limit and price for a swap.
+        
+        With dynamic fees enabled, the swap is simulated and a priority fee is
+        estimated in one batch round-trip; otherwise the configured values are used.
+        
+        Args:
+            instructions (List[Instruction]): Swap instructions in execution order
+            prefetch (SwapPrefetch): Swap prelude state for the pair
+            
+        Returns:
+            Tuple[int, int]: Compute unit limit and price in micro-lamports
+        """
+        if not self._dynamic_fees:
+            return self._unit_budget, self._unit_price
+        try:
+            responses = self._provider.post_json(self._compute_budget_request(instructions, prefetch))
+        except Exception as e:
+            logger.warning("Compute budget lookup failed, using configured values: %s", e)
+            return self._unit_budget, self._unit_price
+        return self._compute_budget_from_response(responses)
+
+    async def _compute_budget_async(self, instructions: List[Instruction], prefetch: SwapPrefetch) -> Tuple[int, int]:
+        """
+        Async counterpart of _compute_budget, using the shared AsyncClient.
+        
+        Args:
+            instructions (List[Instruction]): Swap instructions in execution order
+            prefetch (SwapPrefetch): Swap prelude state for the pair
+            
+        Returns:
+            Tuple[int, int]: Compute unit limit and price in micro-lamports
+        """
+        if not self._dynamic_fees:
+            return self._unit_budget, self._unit_price
+        try:
+            responses = await self._async_provider.post_json(self._compute_budget_request(instructions, prefetch))
+        except Exception as e:
+            logger.warning("Compute budget lookup failed, using configured values: %s", e)
+            return self._unit_budget, self._unit_price
+        return self._compute_budget_from_response(responses)
+
+    def _broadcast(self, raw_txn: bytes) -> Signature:
+        """
+        Send a signed transaction to every send endpoint in parallel.
+        
+        Args:
+            raw_txn (bytes): Serialized signed transaction
+            
+        Returns:
+            Signature: Transaction signature from the first endpoint that accepted it
+            
+        Raises:
+            Exception: The last send error, if no endpoint accepted the transaction
+        """
+        futures = [
+            _SEND_POOL.submit(sender.send_raw_transaction, raw_txn, _RAW_SEND_OPTS)
+            for sender in self._senders
+        ]
+        error = None
+        for future in as_completed(futures):
+            try:
+                return future.result().value
+            except Exception as e:
+                error = e
+        raise error
+
+    def _rebroadcast(self, raw_txn: bytes) -> None:
+        """
+        Resend a signed transaction to every send endpoint without waiting for the results.
+        
+        Args:
+            raw_txn (bytes): Serialized signed transaction
+        """
+        for sender in self._senders:
+            _SEND_POOL.submit(sender.send_raw_transaction, raw_txn, _RAW_SEND_OPTS)
+
+    async def _broadcast_async(self, raw_txn: bytes) -> Signature:
+        """
+        Async counterpart of _broadcast, sending to all endpoints with asyncio.gather.
+        
+        Args:
+            raw_txn (bytes): Serialized signed transaction
+            
+        Returns:
+            Signature: Transaction signature from the first endpoint that accepted it
+            
+        Raises:
+            Exception: The last send error, if no endpoint accepted the transaction
+        """
+        results = await asyncio.gather(
+            *(sender.send_raw_transaction(raw_txn, _RAW_SEND_OPTS) for sender in self._async_senders),
+            return_exceptions=True,
+        )
+        for result in results:
+            if not isinstance(result, BaseException):
+                return result.value
+        raise results[-1]
+
+    async def _rebroadcast_async(self, raw_txn: bytes) -> None:
+        """
+        Resend a signed transaction to every send endpoint, ignoring send errors.
+        
+        Args:
+            raw_txn (bytes): Serialized signed transaction
+        """
+        await asyncio.gather(
+            *(sender.send_raw_transaction(raw_txn, _RAW_SEND_OPTS) for sender in self._async_senders),
+            return_exceptions=True,
+        )
+
+    @staticmethod
+    def _invalidate_pair(pair_address: str) -> None:
+        """
+        Drop a pair's cached pool keys and reserves after a failed swap, in case they were stale.
+        
+        Args:
+            pair_address (str): Address of the trading pair
+        """
+        invalidate_pool(pair_address)
+        _RESERVES_CACHE.pop(pair_address, None)
+
+    def buy(self, pair_address: str, sol_in: float = 0.01, slippage: int = 5) -> bool:
+        """
+        Buy tokens using SOL.
+        
+        Args:
+            pair_address (str): Address of the trading pair
+            sol_in (float): Amount of SOL to spend
+            slippage (int): Maximum acceptable slippage percentage
+            
+        Returns:
+            bool: True if transaction successful, False otherwise
+        """
+        try:
+            logger.info("Initiating buy transaction for pair %s with %s SOL input and %s%% slippage", pair_address, sol_in, slippage)
+
+            logger.info("Fetching swap state for pair %s", pair_address)
+            prefetch = self._prefetch(pair_address)
+            if prefetch is None:
+                logger.error("Failed to fetch pool keys for pair %s", pair_address)
+                return False
+
+            instructions = self._build_buy_instructions(prefetch, sol_in, slippage)
+            unit_limit, unit_price = self._compute_budget(instructions, prefetch)
+            txn = self._compile_transaction(instructions, prefetch.blockhash, unit_limit, unit_price)
+
+            logger.info("Sending transaction")
+            raw_txn = bytes(txn)
+            txn_sig = self._broadcast(raw_txn)
+            logger.info("Transaction Signature: %s", txn_sig)
+
+            logger.info("Confirming transaction")
+            confirmed = confirm_txn(txn_sig, rebroadcast=lambda: self._rebroadcast(raw_txn))
+
+            logger.info("Transaction confirmed: %s", confirmed)
+            if not confirmed:
+                self._invalidate_pair(pair_address)
+            return confirmed
+
+        except Exception as e:
+            logger.error("Error occurred during transaction: %s", e, exc_info=True)
+            return False
+
+    async def buy_async(self, pair_address: str, sol_in: float = 0.01, slippage: int = 5) -> bool:
+        """
+        Buy tokens using SOL without blocking the event loop.
+        
+        Args:
+            pair_address (str): Address of the trading pair
+            sol_in (float): Amount of SOL to spend
+            slippage (int): Maximum acceptable slippage percentage
+            
+        Returns:
+            bool: True if transaction successful, False otherwise
+        """
+        try:
+            logger.info("Initiating buy transaction for pair %s with %s SOL input and %s%% slippage", pair_address, sol_in, slippage)
+
+            logger.info("Fetching swap state for pair %s", pair_address)
+            prefetch = await self._prefetch_async(pair_address)
+            if prefetch is None:
+                logger.error("Failed to fetch pool keys for pair %s", pair_address)
+                return False
+
+            instructions = self._build_buy_instructions(prefetch, sol_in, slippage)
+            unit_limit, unit_price = await self._compute_budget_async(instructions, prefetch)
+            txn = self._compile_transaction(instructions, prefetch.blockhash, unit_limit, unit_price)
 
             logger.info("Sending transaction")
-            txn_sig = self._client.send_transaction(
-                txn=VersionedTransaction(compiled_message, [self._payer]),
-                opts=TxOpts(skip_preflight=True),
-            ).value
-            logger.info(f"Transaction Signature: {txn_sig}")
+            raw_txn = bytes(txn)
+            txn_sig = await self._broadcast_async(raw_txn)
+            logger.info("Transaction Signature: %s", txn_sig)
 
             logger.info("Confirming transaction")
-            confirmed = confirm_txn(txn_sig)
+            confirmed = await confirm_txn_async(txn_sig, rebroadcast=lambda: self._rebroadcast_async(raw_txn))
 
-            logger.info(f"Transaction confirmed: {confirmed}")
+            logger.info("Transaction confirmed: %s", confirmed)
+            if not confirmed:
+                self._invalidate_pair(pair_address)
             return confirmed
 
         except Exception as e:
-            logger.error(f"Error occurred during transaction: {str(e)}", exc_info=True)
+            logger.error("Error occurred during transaction: %s", e, exc_info=True)
             return False
 
+    def _best_buy_pair(self, pair_addresses: List[str], sol_in: float) -> str:
+        """
+        Pick the pair that returns the most tokens for a buy of sol_in.
+        
+        Pool keys for uncached pairs are decoded from the AMM state kept by the pair
+        scan (or one getMultipleAccounts for any AMM it did not return) plus one
+        getMultipleAccounts for their markets; the vaults of all pairs are then read
+        in a single call. The reserves read here are cached, so the following buy
+        does not fetch them again.
+        
+        Args:
+            pair_addresses (List[str]): Candidate trading pairs for the same token
+            sol_in (float): Amount of SOL to spend
+            
+        Returns:
+            str: Address of the best-quoted pair, or the first pair if none could be quoted
+        """
+        cold = [pair for pair in pair_addresses if get_cached_amm_v4_pool_keys(pair) is None]
+        loaded = [
+            (pair, pubkey_from_string(pair), data) for pair in cold
+            if (data := get_scanned_amm_v4_account_data(pair)) is not None
+        ]
+        unscanned = [pair for pair in cold if get_scanned_amm_v4_account_data(pair) is None]
+        if unscanned:
+            amm_ids = [pubkey_from_string(pair) for pair in unscanned]
+            (amm_resp,) = self._provider.batch(
+                (GetMultipleAccounts(amm_ids, _BASE64_PROCESSED, id=0),), (GetMultipleAccountsResp,)
+            )
+            loaded += [
+                (pair, amm_id, account.data)
+                for pair, amm_id, account in zip(unscanned, amm_ids, amm_resp.value)
+                if account is not None
+            ]
+        if loaded:
+            market_ids = [Pubkey.from_bytes(parse_liquidity_state_v4_keys(data).serumMarket) for _, _, data in loaded]
+            (market_resp,) = self._provider.batch(
+                (GetMultipleAccounts(market_ids, _BASE64_ZSTD_PROCESSED, id=0),), (GetMultipleAccountsResp,)
+            )
+            for (pair, amm_id, data), market_account in zip(loaded, market_resp.value):
+                if market_account is not None:
+                    cache_amm_v4_pool_keys(pair, decode_amm_v4_pool_keys(amm_id, data, market_account.data))
+        
+        candidates = [
+            (pair, pool_keys) for pair in pair_addresses
+            if (pool_keys := get_cached_amm_v4_pool_keys(pair)) is not None
+        ]
+        if not candidates:
+            return pair_addresses[0]
+        
+        vaults = [vault for _, pool_keys in candidates for vault in (pool_keys.base_vault, pool_keys.quote_vault)]
+        (vault_resp,) = self._provider.batch(
+            (GetMultipleAccounts(vaults, _BASE64_ZSTD_PROCESSED, id=0),), (GetMultipleAccountsResp,)
+        )
+        slot, fetched_at = vault_resp.context.slot, time.monotonic()
+        
+        quoted_pairs, base_reserves, quote_reserves = [], [], []
+        for i, (pair, pool_keys) in enumerate(candidates):
+            base_account, quote_account = vault_resp.value[2 * i:2 * i + 2]
+            if base_account is None or quote_account is None:
+                continue
+            reserves = amm_v4_reserves_from_balances(
+                pool_keys,
+                token_account_amount(base_account.data),
+                token_account_amount(quote_account.data),
+            )
+            _RESERVES_CACHE[pair] = (slot, fetched_at, *reserves)
+            quoted_pairs.append(pair)
+            base_reserves.append(reserves[0])
+            quote_reserves.append(reserves[1])
+        if not quoted_pairs:
+            return pair_addresses[0]
+        
+        amount_in = int(sol_in * self._sol_decimal)
+        amounts_out = self.sol_for_tokens_many([amount_in] * len(quoted_pairs), base_reserves, quote_reserves)
+        best = max(range(len(quoted_pairs)), key=amounts_out.__getitem__)
+        logger.info("Best of %d pairs is %s at %s tokens for %s SOL", len(quoted_pairs), quoted_pairs[best], amounts_out[best], sol_in)
+        return quoted_pairs[best]
+
     def buy_by_token(self, token_mint_address: str, sol_in: float = 0.01, slippage: int = 5) -> bool:
         """
         Buy tokens using SOL by providing just the token mint address.
@@ -303,22 +1072,27 @@ class RaydiumV4:
             bool: True if transaction successful, False otherwise
         """
         try:
-            logger.info(f"Looking up pair address for token mint {token_mint_address}")
+            logger.info("Looking up pair address for token mint %s", token_mint_address)
             pair_addresses = get_amm_v4_pair_from_rpc(token_mint_address)
             
             if not pair_addresses or len(pair_addresses) == 0:
-                logger.error(f"No trading pair found for token mint {token_mint_address}")
+                logger.error("No trading pair found for token mint %s", token_mint_address)
                 return False
                 
-            # Use the first pair address found
+            # Quote every pair found and buy through the one giving the most tokens
             pair_address = pair_addresses[0]
-            logger.info(f"Found pair address: {pair_address}")
+            if len(pair_addresses) > 1:
+                try:
+                    pair_address = self._best_buy_pair(pair_addresses, sol_in)
+                except Exception as e:
+                    logger.warning("Could not quote %d pairs, using the first: %s", len(pair_addresses), e)
+            logger.info("Found pair address: %s", pair_address)
             
             # Call the regular buy method with the found pair address
             return self.buy(pair_address, sol_in, slippage)
             
         except Exception as e:
-            logger.error(f"Error buying token by mint address: {e}")
+            logger.error("Error buying token by mint address: %s", e)
             return False
 
     def sell(self, pair_address: str, percentage: int = 100, slippage: int = 5) -> bool:
@@ -334,141 +1108,87 @@ class RaydiumV4:
             bool: True if transaction successful, False otherwise
         """
         try:
-            logger.info(f"Initiating sell transaction for pair {pair_address} - Selling {percentage}% with {slippage}% slippage")
+            logger.info("Initiating sell transaction for pair %s - Selling %s%% with %s%% slippage", pair_address, percentage, slippage)
             
             if not (1 <= percentage <= 100):
-                logger.error(f"Invalid percentage value: {percentage}. Must be between 1 and 100")
+                logger.error("Invalid percentage value: %s. Must be between 1 and 100", percentage)
                 return False
 
-            logger.info(f"Fetching AMM V4 pool keys for pair {pair_address}")
-            pool_keys: Optional[AmmV4PoolKeys] = fetch_amm_v4_pool_keys(pair_address)
-            if pool_keys is None:
-                logger.error(f"Failed to fetch pool keys for pair {pair_address}")
+            logger.info("Fetching swap state for pair %s", pair_address)
+            prefetch = self._prefetch(pair_address)
+            if prefetch is None:
+                logger.error("Failed to fetch pool keys for pair %s", pair_address)
                 return False
-            logger.debug("Successfully retrieved pool keys")
-
-            mint = (
-                pool_keys.base_mint if pool_keys.base_mint != self._wsol else pool_keys.quote_mint
-            )
-            logger.debug(f"Using mint address: {mint}")
-
-            logger.info("Retrieving current token balance")
-            token_balance = get_token_balance(str(mint))
-            logger.info(f"Current token balance: {token_balance}")
 
-            if token_balance == 0 or token_balance is None:
-                logger.error("Insufficient token balance for sell transaction")
+            instructions = self._build_sell_instructions(prefetch, percentage, slippage)
+            if instructions is None:
                 return False
+            unit_limit, unit_price = self._compute_budget(instructions, prefetch)
+            txn = self._compile_transaction(instructions, prefetch.blockhash, unit_limit, unit_price)
 
-            token_balance = token_balance * (percentage / 100)
-            logger.info(f"Adjusted token balance for {percentage}% sell: {token_balance}")
-
-            logger.info("Calculating swap amounts and reserves")
-            base_reserve, quote_reserve, token_decimal = get_amm_v4_reserves(pool_keys)
-            amount_out = self.tokens_for_sol(token_balance, base_reserve, quote_reserve)
-            logger.info(f"Estimated SOL output: {amount_out} (base_reserve: {base_reserve}, quote_reserve: {quote_reserve})")
-
-            minimum_amount_out = self.calculate_minimum_amount_out(amount_out, slippage, self._sol_decimal)
-            amount_in = int(token_balance * 10**token_decimal)
-            logger.info(f"Transaction parameters - Input: {amount_in} tokens, Minimum output: {minimum_amount_out} lamports")
-            
-            token_account = get_associated_token_address(self._payer.pubkey(), mint)
-            logger.debug(f"Using token account: {token_account}")
-
-            logger.debug("Generating random seed for WSOL account")
-            seed = base64.urlsafe_b64encode(os.urandom(24)).decode("utf-8")
-            wsol_token_account = Pubkey.create_with_seed(
-                self._payer.pubkey(), seed, self._token_program_id
-            )
-            balance_needed = Token.get_min_balance_rent_for_exempt_for_account(self._client)
-            logger.debug(f"WSOL account address: {wsol_token_account}, required balance: {balance_needed} lamports")
-
-            logger.info("Creating temporary WSOL account")
-            create_wsol_account_instruction = create_account_with_seed(
-                CreateAccountWithSeedParams(
-                    from_pubkey=self._payer.pubkey(),
-                    to_pubkey=wsol_token_account,
-                    base=self._payer.pubkey(),
-                    seed=seed,
-                    lamports=int(balance_needed),
-                    space=self._account_layout_len,
-                    owner=self._token_program_id,
-                )
-            )
+            logger.info("Sending transaction")
+            raw_txn = bytes(txn)
+            txn_sig = self._broadcast(raw_txn)
+            logger.info("Transaction Signature: %s", txn_sig)
 
-            init_wsol_account_instruction = initialize_account(
-                InitializeAccountParams(
-                    program_id=self._token_program_id,
-                    account=wsol_token_account,
-                    mint=self._wsol,
-                    owner=self._payer.pubkey(),
-                )
-            )
+            logger.info("Confirming transaction")
+            confirmed = confirm_txn(txn_sig, rebroadcast=lambda: self._rebroadcast(raw_txn))
 
-            logger.info("Creating swap instructions")
-            swap_instruction = make_amm_v4_swap_instruction(
-                amount_in=amount_in,
-                minimum_amount_out=minimum_amount_out,
-                token_account_in=token_account,
-                token_account_out=wsol_token_account,
-                accounts=pool_keys,
-                owner=self._payer.pubkey(),
-            )
+            logger.info("Transaction confirmed: %s", confirmed)
+            if not confirmed:
+                self._invalidate_pair(pair_address)
+            return confirmed
 
-            logger.info("Preparing to close WSOL account after swap")
-            close_wsol_account_instruction = close_account(
-                CloseAccountParams(
-                    program_id=self._token_program_id,
-                    account=wsol_token_account,
-                    dest=self._payer.pubkey(),
-                    owner=self._payer.pubkey(),
-                )
-            )
+        except Exception as e:
+            logger.error("Error occurred during transaction: %s", e, exc_info=True)
+            return False
 
-            instructions = [
-                set_compute_unit_limit(self._unit_budget),
-                set_compute_unit_price(self._unit_price),
-                create_wsol_account_instruction,
-                init_wsol_account_instruction,
-                swap_instruction,
-                close_wsol_account_instruction,
-            ]
+    async def sell_async(self, pair_address: str, percentage: int = 100, slippage: int = 5) -> bool:
+        """
+        Sell tokens for SOL without blocking the event loop.
+        
+        Args:
+            pair_address (str): Address of the trading pair
+            percentage (int): Percentage of tokens to sell (1-100)
+            slippage (int): Maximum acceptable slippage percentage
+            
+        Returns:
+            bool: True if transaction successful, False otherwise
+        """
+        try:
+            logger.info("Initiating sell transaction for pair %s - Selling %s%% with %s%% slippage", pair_address, percentage, slippage)
+            
+            if not (1 <= percentage <= 100):
+                logger.error("Invalid percentage value: %s. Must be between 1 and 100", percentage)
+                return False
 
-            if percentage == 100:
-                logger.info("Preparing to close token account after swap")
-                close_token_account_instruction = close_account(
-                    CloseAccountParams(
-                        program_id=self._token_program_id,
-                        account=token_account,
-                        dest=self._payer.pubkey(),
-                        owner=self._payer.pubkey(),
-                    )
-                )
-                instructions.append(close_token_account_instruction)
+            logger.info("Fetching swap state for pair %s", pair_address)
+            prefetch = await self._prefetch_async(pair_address)
+            if prefetch is None:
+                logger.error("Failed to fetch pool keys for pair %s", pair_address)
+                return False
 
-            logger.info("Compiling transaction message")
-            compiled_message = MessageV0.try_compile(
-                self._payer.pubkey(),
-                instructions,
-                [],
-                self._client.get_latest_blockhash().value.blockhash,
-            )
+            instructions = self._build_sell_instructions(prefetch, percentage, slippage)
+            if instructions is None:
+                return False
+            unit_limit, unit_price = await self._compute_budget_async(instructions, prefetch)
+            txn = self._compile_transaction(instructions, prefetch.blockhash, unit_limit, unit_price)
 
             logger.info("Sending transaction")
-            txn_sig = self._client.send_transaction(
-                txn=VersionedTransaction(compiled_message, [self._payer]),
-                opts=TxOpts(skip_preflight=True),
-            ).value
-            logger.info(f"Transaction Signature: {txn_sig}")
+            raw_txn = bytes(txn)
+            txn_sig = await self._broadcast_async(raw_txn)
+            logger.info("Transaction Signature: %s", txn_sig)
 
             logger.info("Confirming transaction")
-            confirmed = confirm_txn(txn_sig)
+            confirmed = await confirm_txn_async(txn_sig, rebroadcast=lambda: self._rebroadcast_async(raw_txn))
 
-            logger.info(f"Transaction confirmed: {confirmed}")
+            logger.info("Transaction confirmed: %s", confirmed)
+            if not confirmed:
+                self._invalidate_pair(pair_address)
             return confirmed
 
         except Exception as e:
-            logger.error(f"Error occurred during transaction: {str(e)}", exc_info=True)
+            logger.error("Error occurred during transaction: %s", e, exc_info=True)
             return False
 
     def sell_by_token(self, token_mint_address: str, percentage: int = 100, slippage: int = 5) -> bool:
@@ -484,20 +1204,20 @@ class RaydiumV4:
             bool: True if transaction successful, False otherwise
         """
         try:
-            logger.info(f"Looking up pair address for token mint {token_mint_address}")
+            logger.info("Looking up pair address for token mint %s", token_mint_address)
             pair_addresses = get_amm_v4_pair_from_rpc(token_mint_address)
             
             if not pair_addresses or len(pair_addresses) == 0:
-                logger.error(f"No trading pair found for token mint {token_mint_address}")
+                logger.error("No trading pair found for token mint %s", token_mint_address)
                 return False
                 
             # Use the first pair address found
             pair_address = pair_addresses[0]
-            logger.info(f"Found pair address: {pair_address}")
+            logger.info("Found pair address: %s", pair_address)
             
             # Call the regular sell method with the found pair address
             return self.sell(pair_address, percentage, slippage)
             
         except Exception as e:
-            logger.error(f"Error selling token by mint address: {e}")
+            logger.error("Error selling token by mint address: %s", e)
             return False
@@ -1,6 +1,12 @@
+import json
+import threading
+from typing import Any, Tuple
 from solana.rpc.api import Client as SolanaClient
+from solana.rpc.core import RPCException
 from solders.keypair import Keypair
-from config import Config
+from solders.rpc.responses import batch_from_json
+from config import get_config
+from model.coalescing_http_provider import CoalescingHTTPProvider
 
 class SolanaProvider:
     """
@@ -8,6 +14,7 @@ class SolanaProvider:
     Follows the singleton pattern to ensure only one instance exists.
     """
     _instance = None
+    _lock = threading.Lock()
     
     @classmethod
     def get_instance(cls):
@@ -17,8 +24,11 @@ class SolanaProvider:
         Returns:
             SolanaProvider: The singleton instance
         """
+        # Double-checked so concurrent first calls share one client and HTTP pool
         if cls._instance is None:
-            cls._instance = cls()
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
         return cls._instance
     
     def __init__(self):
@@ -26,8 +36,10 @@ class SolanaProvider:
         Initialize the SolanaProvider with configuration from Config class.
         This should not be called directly - use get_instance() instead.
         """
-        config = Config()
+        config = get_config()
         self._client = config.get_solana_rpc_client()
+        if config.COALESCE_REQUESTS:
+            self._client._provider = CoalescingHTTPProvider(self._client._provider)
         self._payer = config.get_payer_keypair()
     
     @property
@@ -48,4 +60,47 @@ class SolanaProvider:
         Returns:
             Keypair: The payer keypair
         """
-        return self._payer 
\ No newline at end of file
+        return self._payer
+    
+    def batch(self, reqs: Tuple, parsers: Tuple) -> Tuple:
+        """
+        Send several RPC requests in a single JSON-RPC batch round-trip.
+        
+        Args:
+            reqs (Tuple): Request objects from solders.rpc.requests, each with a unique id
+            parsers (Tuple): Response classes from solders.rpc.responses, aligned with reqs
+            
+        Returns:
+            Tuple: Parsed responses in the same order as reqs
+            
+        Raises:
+            RPCException: If any request in the batch returned an RPC error
+        """
+        raw = self._client._provider.make_batch_request_unparsed(reqs)
+        by_id = {resp["id"]: resp for resp in json.loads(raw)}
+        ordered = json.dumps([by_id[req.id] for req in reqs])
+        results = tuple(batch_from_json(ordered, parsers))
+        for result, parser in zip(results, parsers):
+            if not isinstance(result, parser):
+                raise RPCException(result)
+        return results
+
+    def post_json(self, body: Any) -> Any:
+        """
+        Send a raw JSON-RPC request or batch to the RPC endpoint.
+        
+        Used for provider extensions, such as getPriorityFeeEstimate, that have no
+        typed request class.
+        
+        Args:
+            body (Any): JSON-RPC request object or list of request objects
+            
+        Returns:
+            Any: Decoded JSON-RPC response body
+        """
+        provider = self._client._provider
+        response = provider.session.post(
+            content=json.dumps(body), **provider._build_common_request_kwargs()
+        )
+        response.raise_for_status()
+        return response.json()
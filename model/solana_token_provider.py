@@ -22,7 +22,8 @@ class SolanaTokenProvider(TokenProvider):
         self._provider = solana_provider or SolanaProvider.get_instance()
         self._client = self._provider.rpc
         self._payer = self._provider.payer
-        logger.info(f"Initialized SolanaTokenProvider with payer: {self._payer.pubkey()}")
+        self._payer_pubkey = self._payer.pubkey()
+        logger.info(f"Initialized SolanaTokenProvider with payer: {self._payer_pubkey}")
     
     def get_token_balance(self, mint: str | Pubkey) -> Optional[float]:
         """Get token balance for a specific mint.
@@ -42,7 +43,7 @@ class SolanaTokenProvider(TokenProvider):
             logger.info(f"Getting token balance for mint: {mint_pubkey}")
             
             response = self._client.get_token_accounts_by_owner_json_parsed(
-                self._payer.pubkey(),
+                self._payer_pubkey,
                 TokenAccountOpts(mint=mint_pubkey),
                 commitment=Processed
             )
@@ -1,14 +1,65 @@
 import json
 import time
+import random
 import logging
+import threading
+from typing import Any, Callable, Dict, Iterator, Optional
 from solana.rpc.commitment import Confirmed
+from websockets.exceptions import WebSocketException
+from websockets.sync.client import ClientConnection, connect
+from solders.commitment_config import CommitmentLevel
+from solders.rpc.config import RpcSignatureSubscribeConfig
+from solders.rpc.requests import SignatureSubscribe, SignatureUnsubscribe
 from solders.signature import Signature
+from solders.transaction_status import TransactionConfirmationStatus
 
+from config import get_config
 from model.transaction_provider import TransactionProvider
 from model.solana_provider import SolanaProvider
+from utils.pool_utils import is_permanent_rpc_error
 
 logger = logging.getLogger(__name__)
 
+_CONFIRMED_STATUSES = (TransactionConfirmationStatus.Confirmed, TransactionConfirmationStatus.Finalized)
+
+# Attempts and first backoff delay, in seconds, for the fallback signature status check
+STATUS_CHECK_ATTEMPTS = 3
+STATUS_RETRY_DELAY = 0.5
+
+# Polling backoff for confirmations without a subscription: first delay and jitter, in seconds
+CONFIRM_INITIAL_DELAY = 0.2
+CONFIRM_JITTER = 0.1
+
+
+def confirm_poll_delays(retry_interval: float) -> Iterator[float]:
+    """Yield the sleeps between confirmation polls.
+
+    They start at CONFIRM_INITIAL_DELAY and double up to retry_interval, each with
+    up to CONFIRM_JITTER seconds of jitter either way.
+
+    Args:
+        retry_interval (float): Longest delay between polls, in seconds
+
+    Yields:
+        float: Seconds to sleep before the next poll
+    """
+    delay = CONFIRM_INITIAL_DELAY
+    while True:
+        yield max(min(delay, retry_interval) + random.uniform(-CONFIRM_JITTER, CONFIRM_JITTER), 0)
+        delay *= 2
+
+
+class _SignatureWaiter:
+    """A confirmation waiting for its signatureSubscribe result and notification."""
+    __slots__ = ("done", "subscription", "err", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.subscription: Optional[int] = None
+        self.err: Any = None
+        self.error: Optional[BaseException] = None
+
+
 class SolanaTransactionProvider(TransactionProvider):
     """Solana implementation of TransactionProvider."""
     
@@ -21,50 +72,281 @@ class SolanaTransactionProvider(TransactionProvider):
         """
         self._provider = solana_provider or SolanaProvider.get_instance()
         self._client = self._provider.rpc
+        
+        # One long-lived WebSocket, opened on first use and shared by all confirmations.
+        # The lock only covers connecting and sending; a reader thread routes subscribe
+        # results by request id and notifications by subscription id, so concurrent
+        # confirmations wait independently.
+        self._ws_url = get_config().get("env.helius.ws_url")
+        self._ws: Optional[ClientConnection] = None
+        self._ws_lock = threading.Lock()
+        self._ws_request_id = 0
+        self._routes_lock = threading.Lock()
+        self._pending: Dict[int, _SignatureWaiter] = {}
+        self._subscriptions: Dict[int, _SignatureWaiter] = {}
         logger.info("Initialized SolanaTransactionProvider")
     
     def confirm_transaction(
         self,
         signature: Signature,
         max_retries: int = 20,
-        retry_interval: int = 3
+        retry_interval: int = 3,
+        rebroadcast: Optional[Callable[[], None]] = None
     ) -> bool:
         """Confirm a Solana transaction by its signature.
         
+        Waits for a signatureSubscribe notification. If the subscription cannot be made
+        or the socket fails, polls getTransaction for the rest of the time budget instead.
+        
         Args:
             signature (Signature): Transaction signature to confirm
             max_retries (int, optional): Maximum number of confirmation attempts. Defaults to 20.
             retry_interval (int, optional): Time between retries in seconds. Defaults to 3.
+            rebroadcast (Optional[Callable[[], None]], optional): Called every retry_interval
+                seconds while the confirmation is pending, e.g. to resend the transaction.
             
         Returns:
             bool: True if transaction confirmed successfully, False otherwise
         """
-        retries = 1
-        logger.info(f"Confirming transaction: {signature}")
+        timeout = max_retries * retry_interval
+        deadline = time.monotonic() + timeout
+        logger.info("Confirming transaction: %s", signature)
         
-        while retries < max_retries:
+        try:
+            err = self._await_signature_notification(signature, timeout, retry_interval, rebroadcast)
+            if err is None:
+                logger.info("Transaction confirmed")
+                return True
+            logger.error("Transaction failed with error: %s", err)
+            return False
+        except TimeoutError:
+            logger.warning("No confirmation notification within %ss", timeout)
+            return self._confirm_by_status(signature)
+        except (WebSocketException, OSError) as e:
+            logger.warning("Signature subscription failed, polling instead: %s", e)
+            self._close_ws()
+        
+        return self._poll_transaction(signature, deadline, retry_interval, rebroadcast)
+    
+    def _await_signature_notification(
+        self,
+        signature: Signature,
+        timeout: float,
+        tick_interval: float,
+        on_tick: Optional[Callable[[], None]] = None
+    ):
+        """Subscribe to a signature and block until its notification arrives.
+        
+        Args:
+            signature (Signature): Transaction signature to watch
+            timeout (float): Seconds to wait for the notification
+            tick_interval (float): Seconds between on_tick calls
+            on_tick (Optional[Callable[[], None]]): Called whenever tick_interval passes without a notification
+            
+        Returns:
+            The transaction error from the notification, or None on success
+            
+        Raises:
+            TimeoutError: If no notification arrives within the timeout
+            WebSocketException: If the subscription is rejected or the socket fails
+        """
+        deadline = time.monotonic() + timeout
+        waiter = _SignatureWaiter()
+        config = RpcSignatureSubscribeConfig(commitment=CommitmentLevel.Confirmed)
+        
+        with self._ws_lock:
+            ws = self._connect_ws(timeout)
+            request_id = self._next_ws_request_id()
+            with self._routes_lock:
+                self._pending[request_id] = waiter
+            try:
+                ws.send(SignatureSubscribe(signature, config, id=request_id).to_json())
+            except BaseException:
+                with self._routes_lock:
+                    self._pending.pop(request_id, None)
+                raise
+        
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if waiter.done.wait(timeout=max(min(remaining, tick_interval), 0)):
+                    break
+                if remaining <= tick_interval:
+                    raise TimeoutError
+                if on_tick is not None:
+                    on_tick()
+            if waiter.error is not None:
+                raise waiter.error
+            return waiter.err
+        finally:
+            with self._routes_lock:
+                self._pending.pop(request_id, None)
+                subscription = waiter.subscription
+                active = subscription is not None and self._subscriptions.pop(subscription, None) is not None
+            # The server drops a subscription once it has notified, so only abandoned ones are removed
+            if active:
+                self._unsubscribe(subscription)
+    
+    def _connect_ws(self, timeout: float) -> ClientConnection:
+        """Open the shared WebSocket and its reader thread if needed; call with _ws_lock held."""
+        if self._ws is None:
+            try:
+                ws = connect(self._ws_url, open_timeout=timeout)
+            except TimeoutError as e:
+                # Not the notification timeout: the socket never opened
+                raise WebSocketException("WebSocket open timed out") from e
+            self._ws = ws
+            threading.Thread(target=self._read_ws, args=(ws,), name="signature-ws-reader", daemon=True).start()
+        return self._ws
+    
+    def _read_ws(self, ws: ClientConnection) -> None:
+        """Route messages from one WebSocket connection to their waiters until it closes."""
+        try:
+            for raw in ws:
+                message = json.loads(raw)
+                message_id = message.get("id")
+                with self._routes_lock:
+                    if message_id is not None:
+                        waiter = self._pending.pop(message_id, None)
+                        if waiter is None:
+                            # An unsubscribe reply, or a subscription already given up on
+                            continue
+                        if "error" in message:
+                            waiter.error = WebSocketException(message["error"])
+                            waiter.done.set()
+                        else:
+                            waiter.subscription = message["result"]
+                            self._subscriptions[waiter.subscription] = waiter
+                    elif message.get("method") == "signatureNotification":
+                        params = message["params"]
+                        waiter = self._subscriptions.pop(params["subscription"], None)
+                        if waiter is not None:
+                            waiter.err = params["result"]["value"]["err"]
+                            waiter.done.set()
+            error: BaseException = WebSocketException("WebSocket closed")
+        except Exception as e:
+            error = e
+        
+        # Fail everything still waiting on this connection so it falls back to polling
+        with self._ws_lock:
+            if self._ws is ws:
+                self._ws = None
+        with self._routes_lock:
+            waiters = list(self._pending.values()) + list(self._subscriptions.values())
+            self._pending.clear()
+            self._subscriptions.clear()
+        for waiter in waiters:
+            waiter.error = error if isinstance(error, (WebSocketException, OSError)) else WebSocketException(str(error))
+            waiter.done.set()
+    
+    def _unsubscribe(self, subscription: int) -> None:
+        """Cancel a signature subscription on the shared WebSocket, ignoring socket errors."""
+        with self._ws_lock:
+            if self._ws is None:
+                return
+            try:
+                self._ws.send(SignatureUnsubscribe(subscription, id=self._next_ws_request_id()).to_json())
+            except (WebSocketException, OSError):
+                pass
+    
+    def _next_ws_request_id(self) -> int:
+        """Get a fresh JSON-RPC request id for the WebSocket; call with _ws_lock held."""
+        self._ws_request_id += 1
+        return self._ws_request_id
+    
+    def _close_ws(self) -> None:
+        """Drop the WebSocket so the next confirmation reconnects."""
+        with self._ws_lock:
+            if self._ws is not None:
+                try:
+                    self._ws.close()
+                except Exception:
+                    pass
+                self._ws = None
+    
+    def _poll_transaction(
+        self,
+        signature: Signature,
+        deadline: float,
+        retry_interval: float,
+        rebroadcast: Optional[Callable[[], None]] = None
+    ) -> bool:
+        """Poll getTransaction with exponential backoff until the deadline.
+        
+        Uses the same schedule as confirm_txn_async, see confirm_poll_delays.
+        
+        Args:
+            signature (Signature): Transaction signature to confirm
+            deadline (float): time.monotonic() value after which to give up
+            retry_interval (float): Longest delay between polls, in seconds
+            rebroadcast (Optional[Callable[[], None]]): Called before each new poll
+            
+        Returns:
+            bool: True if the transaction is confirmed without error, False otherwise
+        """
+        attempt = 1
+        delays = confirm_poll_delays(retry_interval)
+        while True:
             try:
                 txn_res = self._client.get_transaction(
                     signature,
                     encoding="json",
                     commitment=Confirmed,
-                    max_supported_transaction_version=0
-                )
+                    max_supported_transaction_version=0)
                 
-                txn_json = json.loads(txn_res.value.transaction.meta.to_json())
-                
-                if txn_json['err'] is None:
-                    logger.info(f"Transaction confirmed after {retries} attempts")
-                    return True
-                
-                logger.warning(f"Transaction not confirmed on attempt {retries}")
-                if txn_json['err']:
-                    logger.error(f"Transaction failed with error: {txn_json['err']}")
+                if txn_res.value is not None:
+                    err = txn_res.value.transaction.meta.err
+                    if err is None:
+                        logger.info("Transaction confirmed after %s polls", attempt)
+                        return True
+                    logger.error("Transaction failed with error: %s", err)
                     return False
+                logger.debug("Transaction not found yet (poll %s)", attempt)
             except Exception as e:
-                logger.warning(f"Awaiting confirmation (attempt {retries}): {e}")
-                retries += 1
-                time.sleep(retry_interval)
+                if is_permanent_rpc_error(e):
+                    logger.error("Transaction confirmation failed: %s", e)
+                    return False
+                logger.warning("Awaiting confirmation (poll %s): %s", attempt, e)
+            
+            sleep_for = next(delays)
+            if time.monotonic() + sleep_for >= deadline:
+                break
+            attempt += 1
+            if rebroadcast is not None:
+                rebroadcast()
+            time.sleep(sleep_for)
+        
+        logger.error("No confirmation after %s polls. Transaction confirmation failed.", attempt)
+        return False
+    
+    def _confirm_by_status(self, signature: Signature) -> bool:
+        """Check a signature with getSignatureStatuses.
+        
+        Transient RPC failures (rate limits, timeouts, a lagging node) are retried up to
+        STATUS_CHECK_ATTEMPTS times; any other error fails the check at once.
+        
+        Args:
+            signature (Signature): Transaction signature to check
+            
+        Returns:
+            bool: True if the transaction is confirmed without error, False otherwise
+        """
+        for attempt in range(STATUS_CHECK_ATTEMPTS):
+            try:
+                status = self._client.get_signature_statuses([signature]).value[0]
+                break
+            except Exception as e:
+                if is_permanent_rpc_error(e) or attempt == STATUS_CHECK_ATTEMPTS - 1:
+                    logger.error("Failed to fetch signature status: %s", e)
+                    return False
+                logger.warning("Signature status check failed, retrying: %s", e)
+                time.sleep(STATUS_RETRY_DELAY * 2 ** attempt)
         
-        logger.error(f"Max retries ({max_retries}) reached. Transaction confirmation failed.")
-        return False 
\ No newline at end of file
+        if status is None or status.confirmation_status not in _CONFIRMED_STATUSES:
+            logger.error("Transaction not confirmed. Transaction confirmation failed.")
+            return False
+        if status.err is not None:
+            logger.error("Transaction failed with error: %s", status.err)
+            return False
+        logger.info("Transaction %s per signature status", status.confirmation_status)
+        return True
@@ -0,0 +1,85 @@
+"""
+Tests for the AMM v4 quote math
+"""
+import math
+import random
+import unittest
+from fractions import Fraction
+
+from model.raydium_v4 import RaydiumV4
+from utils.pool_utils import AMM_V4_FEE_BPS, amm_v4_out
+
+U64_MAX = 2 ** 64 - 1
+
+def exact_out(amount_in, reserve_in, reserve_out, fee_bps=25):
+    """Constant-product output computed with exact fractions, floored like the program"""
+    amount_in_after_fee = math.floor(Fraction(amount_in * (10_000 - fee_bps), 10_000))
+    return math.floor(Fraction(reserve_out * amount_in_after_fee, reserve_in + amount_in_after_fee))
+
+class TestAmmV4Quotes(unittest.TestCase):
+    """Test cases for the RaydiumV4 quote helpers"""
+
+    def test_sol_for_tokens_known_value(self):
+        """Test a quote worked out by hand"""
+        # 1 SOL in, 0.25% fee: 997_500_000 lamports against 500 SOL / 1_000_000 tokens (6 decimals)
+        amount_out = RaydiumV4.sol_for_tokens(1_000_000_000, 1_000_000_000_000, 500_000_000_000)
+        self.assertEqual(amount_out, 1_000_000_000_000 * 997_500_000 // 500_997_500_000)
+        self.assertEqual(amount_out, 1_991_027_899)
+
+    def test_quotes_are_exact_at_large_reserves(self):
+        """Test that reserves beyond 2**53 give the exact floored result, not a float approximation"""
+        rng = random.Random(7)
+        for _ in range(500):
+            base_reserve = rng.randrange(2 ** 53, U64_MAX)
+            quote_reserve = rng.randrange(2 ** 53, U64_MAX)
+            amount_in = rng.randrange(1, U64_MAX)
+            self.assertEqual(
+                RaydiumV4.sol_for_tokens(amount_in, base_reserve, quote_reserve),
+                exact_out(amount_in, quote_reserve, base_reserve),
+            )
+            self.assertEqual(
+                RaydiumV4.tokens_for_sol(amount_in, base_reserve, quote_reserve),
+                exact_out(amount_in, base_reserve, quote_reserve),
+            )
+
+    def test_quotes_return_ints_below_reserve(self):
+        """Test that quotes are ints and never drain the output reserve"""
+        amount_out = RaydiumV4.tokens_for_sol(U64_MAX, 10 ** 6, 10 ** 6)
+        self.assertIsInstance(amount_out, int)
+        self.assertLess(amount_out, 10 ** 6)
+        self.assertEqual(RaydiumV4.sol_for_tokens(0, 10 ** 12, 10 ** 9), 0)
+
+    def test_round_trip_loses_value(self):
+        """Test that buying and selling back returns less than was put in"""
+        tokens = RaydiumV4.sol_for_tokens(10 ** 9, 10 ** 15, 10 ** 12)
+        self.assertLess(RaydiumV4.tokens_for_sol(tokens, 10 ** 15 - tokens, 10 ** 12 + 10 ** 9), 10 ** 9)
+
+    def test_calculate_minimum_amount_out(self):
+        """Test that slippage is applied in integer base units"""
+        self.assertEqual(RaydiumV4.calculate_minimum_amount_out(1_991_027_899, 5), 1_891_476_504)
+        self.assertEqual(RaydiumV4.calculate_minimum_amount_out(U64_MAX, 1), U64_MAX * 99 // 100)
+
+    def test_amm_v4_out_fee(self):
+        """Test that the fee is taken from the input and can be overridden"""
+        self.assertEqual(AMM_V4_FEE_BPS, 25)
+        self.assertEqual(amm_v4_out(10_000, 10 ** 12, 10 ** 12, fee_bps=0), 10 ** 12 * 10_000 // (10 ** 12 + 10_000))
+        self.assertEqual(amm_v4_out(10_000, 10 ** 12, 10 ** 12), 10 ** 12 * 9_975 // (10 ** 12 + 9_975))
+
+    def test_many_matches_single_quotes(self):
+        """Test that the element-wise helpers agree with one quote at a time"""
+        rng = random.Random(11)
+        amounts = [rng.randrange(1, 2 ** 40) for _ in range(50)]
+        base_reserves = [rng.randrange(2 ** 30, U64_MAX) for _ in range(50)]
+        quote_reserves = [rng.randrange(2 ** 30, U64_MAX) for _ in range(50)]
+        self.assertEqual(
+            RaydiumV4.sol_for_tokens_many(amounts, base_reserves, quote_reserves),
+            [RaydiumV4.sol_for_tokens(*args) for args in zip(amounts, base_reserves, quote_reserves)],
+        )
+        self.assertEqual(
+            RaydiumV4.tokens_for_sol_many(amounts, base_reserves, quote_reserves),
+            [RaydiumV4.tokens_for_sol(*args) for args in zip(amounts, base_reserves, quote_reserves)],
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+"""
+Tests for the CoalescingHTTPProvider class
+"""
+import json
+import threading
+import time
+import unittest
+
+import httpx
+from solana.rpc.core import RPCException
+from solana.rpc.providers.http import HTTPProvider
+from solders.rpc.requests import GetBlockHeight, GetSlot
+from solders.rpc.responses import GetBlockHeightResp, GetSlotResp
+
+from model.coalescing_http_provider import CoalescingHTTPProvider, _QueuedRequest
+
+
+class FakeSession:
+    """Answers JSON-RPC posts with each request's id plus 1000 as its result"""
+
+    def __init__(self, array_status=200, array_body=None, errors=(), gate=None):
+        self.array_status = array_status
+        self.array_body = array_body
+        self.errors = set(errors)
+        self.gate = gate
+        self.posts = []
+        self.lock = threading.Lock()
+
+    def answer(self, item):
+        if item["id"] in self.errors:
+            return {"jsonrpc": "2.0", "error": {"code": -32602, "message": "Invalid params"}, "id": item["id"]}
+        return {"jsonrpc": "2.0", "result": item["id"] + 1000, "id": item["id"]}
+
+    def post(self, content=None, **kwargs):
+        body = json.loads(content)
+        with self.lock:
+            self.posts.append(body)
+            first = len(self.posts) == 1
+        if first and self.gate is not None:
+            self.gate.wait(5)
+        request = httpx.Request("POST", "http://fake")
+        if isinstance(body, list):
+            if self.array_status != 200 or self.array_body is not None:
+                return httpx.Response(self.array_status, json=self.array_body, request=request)
+            # Answer out of order so results must be matched by id
+            return httpx.Response(200, json=[self.answer(item) for item in reversed(body)], request=request)
+        return httpx.Response(200, json=self.answer(body), request=request)
+
+
+class TestCoalescingHTTPProvider(unittest.TestCase):
+    """Test cases for CoalescingHTTPProvider class"""
+
+    def make_provider(self, session):
+        provider = HTTPProvider("http://fake")
+        provider.session = session
+        return CoalescingHTTPProvider(provider)
+
+    def test_batch_ids_are_remapped(self):
+        """Test that each request gets the response for its own position, whatever id it had"""
+        session = FakeSession()
+        provider = self.make_provider(session)
+        batch = [_QueuedRequest(GetSlot(id=77), GetSlotResp), _QueuedRequest(GetBlockHeight(id=77), GetBlockHeightResp)]
+
+        provider._post_batch(batch)
+
+        self.assertEqual([item["id"] for item in session.posts[0]], [0, 1])
+        self.assertEqual([request.result.value for request in batch], [1000, 1001])
+        self.assertTrue(all(request.done and request.error is None for request in batch))
+
+    def test_batch_error_only_fails_its_request(self):
+        """Test that an error response is raised only for the request it belongs to"""
+        provider = self.make_provider(FakeSession(errors={1}))
+        batch = [_QueuedRequest(GetSlot(), GetSlotResp) for _ in range(3)]
+
+        provider._post_batch(batch)
+
+        self.assertIsInstance(batch[1].error, RPCException)
+        self.assertEqual([batch[0].result.value, batch[2].result.value], [1000, 1002])
+
+    def test_rejected_batch_is_sent_one_by_one(self):
+        """Test the fallback when the endpoint does not accept a JSON-RPC array"""
+        for status, body in ((413, None), (200, {"jsonrpc": "2.0", "error": {"code": -32600, "message": "Invalid request"}, "id": None})):
+            session = FakeSession(array_status=status, array_body=body)
+            provider = self.make_provider(session)
+            batch = [_QueuedRequest(GetSlot(id=i), GetSlotResp) for i in range(3)]
+
+            provider._post_batch(batch)
+
+            self.assertEqual(len(session.posts), 4)
+            self.assertEqual([request.result.value for request in batch], [1000, 1001, 1002])
+
+    def test_concurrent_requests_share_a_batch(self):
+        """Test that calls made while a request is in flight are sent together"""
+        gate = threading.Event()
+        session = FakeSession(gate=gate)
+        provider = self.make_provider(session)
+        results = {}
+
+        def call(i):
+            results[i] = provider.make_request(GetSlot(id=i), GetSlotResp).value
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(8)]
+        threads[0].start()
+        while not session.posts:
+            time.sleep(0.01)
+        for thread in threads[1:]:
+            thread.start()
+        while len(provider._queue) < 7:
+            time.sleep(0.01)
+        gate.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(session.posts), 2)
+        self.assertEqual(len(session.posts[1]), 7)
+        self.assertEqual(results[0], 1000)
+        self.assertEqual(sorted(results), list(range(8)))
+        self.assertEqual(sorted(results.values())[1:], list(range(1000, 1007)))
+
+    def test_interrupted_send_releases_waiters(self):
+        """Test that a BaseException in the leader fails its batch and hands the queue on"""
+        gate = threading.Event()
+        session = FakeSession(gate=gate)
+        provider = self.make_provider(session)
+        errors = {}
+
+        def interrupted_post(content=None, **kwargs):
+            gate.wait(5)
+            raise KeyboardInterrupt
+
+        def call(i):
+            try:
+                provider.make_request(GetSlot(id=i), GetSlotResp)
+            except BaseException as e:
+                errors[i] = e
+
+        session.post = interrupted_post
+        leader = threading.Thread(target=call, args=(0,))
+        leader.start()
+        while not provider._sending:
+            time.sleep(0.01)
+        follower = threading.Thread(target=call, args=(1,))
+        follower.start()
+        while not provider._queue:
+            time.sleep(0.01)
+        session.post = FakeSession().post
+        # The follower was queued after the leader took its batch, so it becomes the next leader
+        gate.set()
+        leader.join(5)
+        follower.join(5)
+
+        self.assertIsInstance(errors[0], KeyboardInterrupt)
+        self.assertNotIn(1, errors)
+        self.assertFalse(provider._sending)
+        self.assertEqual(provider.make_request(GetSlot(id=2), GetSlotResp).value, 1002)
+
+    def test_interrupted_batch_fails_followers(self):
+        """Test that followers in an interrupted batch get an error instead of blocking"""
+        provider = self.make_provider(FakeSession())
+        batch = [_QueuedRequest(GetSlot(id=i), GetSlotResp) for i in range(3)]
+        provider._queue.extend(batch)
+        provider._sending = True
+
+        def interrupted_post_batch(batch):
+            raise SystemExit
+
+        provider._post_batch = interrupted_post_batch
+        with self.assertRaises(SystemExit):
+            provider._send_next_batch()
+
+        self.assertTrue(all(request.ready.is_set() and request.done for request in batch))
+        self.assertTrue(all(isinstance(request.error, RuntimeError) for request in batch))
+        self.assertFalse(provider._sending)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+"""
+Tests for the Config class
+"""
+import os
+import pickle
+import unittest
+from unittest.mock import patch
+
+from solders.keypair import Keypair
+
+import config
+from config import Config
+
+CACHE_PATH = config.Path(config.__file__).parent / 'config.yaml.pkl'
+ENV = {'HELIUS_API_KEY': 'test-key', 'ACC_PRIVATE_KEY': str(Keypair())}
+
+class TestConfigCache(unittest.TestCase):
+    """Test cases for the parsed config sidecar cache"""
+
+    def setUp(self):
+        """Keep any existing sidecar so the tests can restore it"""
+        self.saved = CACHE_PATH.read_bytes() if CACHE_PATH.exists() else None
+
+    def tearDown(self):
+        """Restore the sidecar as it was before the test"""
+        if self.saved is None:
+            CACHE_PATH.unlink(missing_ok=True)
+        else:
+            CACHE_PATH.write_bytes(self.saved)
+
+    def test_corrupt_sidecar_falls_back_to_yaml(self):
+        """Test that unusable sidecars are ignored, the YAML is re-parsed and the cache rewritten"""
+        bad_sidecars = [
+            b"not a pickle",
+            pickle.dumps(5),
+            pickle.dumps(Config),
+            pickle.dumps((1, 2, 3)),
+            pickle.dumps((0, {'solana': {}})),
+            pickle.dumps((CACHE_PATH.with_suffix('').stat().st_mtime_ns, ['not', 'a', 'dict'])),
+            pickle.dumps(({'a': 1}, {}))[:-3],
+        ]
+        for data in bad_sidecars:
+            CACHE_PATH.write_bytes(data)
+            with patch.dict(os.environ, ENV), patch('config.yaml.load', wraps=config.yaml.load) as load:
+                cfg = Config()
+            load.assert_called_once()
+            self.assertTrue(cfg.get('programs.raydium.amm_v4'))
+            mtime, parsed = pickle.loads(CACHE_PATH.read_bytes())
+            self.assertIsInstance(parsed, dict)
+
+    def test_valid_sidecar_skips_yaml(self):
+        """Test that a sidecar matching config.yaml is used without parsing the YAML"""
+        with patch.dict(os.environ, ENV):
+            Config()
+            with patch('config.yaml.load') as load:
+                cfg = Config()
+        load.assert_not_called()
+        self.assertTrue(cfg.get('programs.raydium.amm_v4'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+"""
+Tests for the fixed-offset AMM v4 and market v3 parsers
+"""
+import os
+import unittest
+
+from model.layout_amm_v4 import (
+    LIQUIDITY_STATE_LAYOUT_V4,
+    MARKET_STATE_LAYOUT_V3,
+    LiquidityStateV4Keys,
+    MarketStateV3Keys,
+    parse_liquidity_state_v4_keys,
+    parse_market_state_v3_keys,
+)
+
+class TestLayoutAmmV4(unittest.TestCase):
+    """Test that the struct parsers agree with the construct layouts"""
+
+    def test_liquidity_state_v4_keys_match_layout(self):
+        """Test every field of parse_liquidity_state_v4_keys on random account data"""
+        for _ in range(200):
+            data = os.urandom(LIQUIDITY_STATE_LAYOUT_V4.sizeof())
+            expected = LIQUIDITY_STATE_LAYOUT_V4.parse(data)
+            keys = parse_liquidity_state_v4_keys(data)
+            for field in LiquidityStateV4Keys._fields:
+                self.assertEqual(getattr(keys, field), expected[field], field)
+
+    def test_market_state_v3_keys_match_layout(self):
+        """Test every field of parse_market_state_v3_keys on random account data"""
+        for _ in range(200):
+            data = bytearray(os.urandom(MARKET_STATE_LAYOUT_V3.sizeof()))
+            # The layout requires the unused account flag bits to be zero
+            data[5:13] = bytes([data[5] & 0x7F]) + bytes(7)
+            data = bytes(data)
+            expected = MARKET_STATE_LAYOUT_V3.parse(data)
+            keys = parse_market_state_v3_keys(data)
+            for field in MarketStateV3Keys._fields:
+                self.assertEqual(getattr(keys, field), expected[field], field)
+
+    def test_trailing_data_is_ignored(self):
+        """Test that accounts longer than the layout parse the same"""
+        data = os.urandom(LIQUIDITY_STATE_LAYOUT_V4.sizeof())
+        self.assertEqual(parse_liquidity_state_v4_keys(data + b"\0" * 16), parse_liquidity_state_v4_keys(data))
+
+    def test_short_data_is_rejected(self):
+        """Test that truncated accounts raise ValueError"""
+        with self.assertRaises(ValueError):
+            parse_liquidity_state_v4_keys(bytes(LIQUIDITY_STATE_LAYOUT_V4.sizeof() - 1))
+        with self.assertRaises(ValueError):
+            parse_market_state_v3_keys(bytes(MARKET_STATE_LAYOUT_V3.sizeof() - 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+"""
+Tests for the p-token batch instruction built by RaydiumV4
+"""
+import unittest
+
+from solders.pubkey import Pubkey
+from spl.token.constants import TOKEN_PROGRAM_ID
+from spl.token.instructions import CloseAccountParams, close_account
+
+from model.raydium_v4 import TOKEN_BATCH_DISCRIMINATOR, RaydiumV4
+
+class TestTokenBatch(unittest.TestCase):
+    """Test cases for RaydiumV4._build_batch_close"""
+
+    def setUp(self):
+        """Set up a RaydiumV4 without loading the configuration"""
+        self.raydium = RaydiumV4.__new__(RaydiumV4)
+        self.raydium._token_program_id = TOKEN_PROGRAM_ID
+        self.owner = Pubkey.new_unique()
+        self.closes = [
+            close_account(CloseAccountParams(
+                program_id=TOKEN_PROGRAM_ID,
+                account=Pubkey.new_unique(),
+                dest=self.owner,
+                owner=self.owner,
+            ))
+            for _ in range(2)
+        ]
+
+    def test_wire_format(self):
+        """Test the discriminator and the [accounts: u8][data length: u8][data] entries"""
+        batch = self.raydium._build_batch_close(self.closes)
+
+        self.assertEqual(TOKEN_BATCH_DISCRIMINATOR, 0xFF)
+        expected = bytes([0xFF])
+        for ix in self.closes:
+            expected += bytes([len(ix.accounts), len(ix.data)]) + bytes(ix.data)
+        self.assertEqual(bytes(batch.data), expected)
+        # CloseAccount is instruction 9 with three accounts
+        self.assertEqual(bytes(batch.data), bytes([0xFF, 3, 1, 9, 3, 1, 9]))
+
+    def test_accounts_are_concatenated_in_order(self):
+        """Test that the batch carries every sub-instruction's accounts, in order"""
+        batch = self.raydium._build_batch_close(self.closes)
+
+        self.assertEqual(batch.program_id, TOKEN_PROGRAM_ID)
+        self.assertEqual(list(batch.accounts), [meta for ix in self.closes for meta in ix.accounts])
+
+
+if __name__ == '__main__':
+    unittest.main()
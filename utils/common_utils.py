@@ -1,84 +1,150 @@
 import json
 import time
+import asyncio
 import logging
+import threading
+from typing import Awaitable, Callable, Optional, Tuple
 from solana.rpc.commitment import Confirmed, Processed
-from solana.rpc.types import TokenAccountOpts
 from solders.signature import Signature #type: ignore
-from solders.pubkey import Pubkey  # type: ignore
+from spl.token.instructions import get_associated_token_address
 from model.solana_provider import SolanaProvider
+from model.async_solana_provider import AsyncSolanaProvider
+from model.solana_transaction_provider import SolanaTransactionProvider, confirm_poll_delays
+from config import get_config
+from utils.pool_utils import is_permanent_rpc_error, pubkey_from_string
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Initialize Solana provider
-solana_provider = SolanaProvider.get_instance()
-client = solana_provider.rpc
-payer_keypair = solana_provider.payer
+# Shared across confirmations so they reuse one WebSocket, created on first use
+_transaction_provider = None
+_transaction_provider_lock = threading.Lock()
 
-logger.info("Successfully initialized Solana provider")
-logger.info(f"Successfully initialized payer keypair: {payer_keypair.pubkey()}")
+def __getattr__(name: str):
+    # Legacy module-level provider, client and payer, resolved on first access so importing
+    # this module does not load the configuration
+    if name == 'solana_provider':
+        return SolanaProvider.get_instance()
+    if name == 'client':
+        return SolanaProvider.get_instance().rpc
+    if name == 'payer_keypair':
+        return SolanaProvider.get_instance().payer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-def get_token_balance(mint_str: str) -> float | None:
+def get_token_balance(mint_str: str) -> Optional[Tuple[int, int]]:
+    """Get the payer's balance of a mint as (amount in base units, decimals).
+
+    Returns None when the payer has no token account for the mint or it is empty.
+    """
     try:
+        solana_provider = SolanaProvider.get_instance()
+        payer_keypair = solana_provider.payer
         if not payer_keypair:
             logger.error("Cannot get token balance: payer_keypair is not initialized")
             return None
             
-        mint = Pubkey.from_string(mint_str)
-        logger.info(f"Getting token balance for mint: {mint_str}")
+        mint = pubkey_from_string(mint_str)
+        logger.info("Getting token balance for mint: %s", mint_str)
         
-        response = client.get_token_accounts_by_owner_json_parsed(
-            payer_keypair.pubkey(),
-            TokenAccountOpts(mint=mint),
-            commitment=Processed
-        )
+        # The payer holds the mint in its ATA, so read that account instead of scanning the owner.
+        # The ATA address depends on the mint's token program, so fetch both candidates in one call.
+        owner = payer_keypair.pubkey()
+        token_accounts = [
+            get_associated_token_address(owner, mint),
+            get_associated_token_address(owner, mint, get_config().TOKEN_2022_PROGRAM_ID),
+        ]
+        response = solana_provider.rpc.get_multiple_accounts_json_parsed(token_accounts, commitment=Processed)
+        account = next((account for account in response.value if account is not None), None)
+        if account is None:
+            logger.warning("No token account for mint: %s", mint_str)
+            return None
 
-        if response.value:
-            accounts = response.value
-            if accounts:
-                token_amount = accounts[0].account.data.parsed['info']['tokenAmount']['uiAmount']
-                if token_amount:
-                    logger.info(f"Token balance: {token_amount}")
-                    return float(token_amount)
+        token_amount_info = account.data.parsed['info']['tokenAmount']
+        token_amount = int(token_amount_info['amount'])
+        if token_amount:
+            decimals = token_amount_info['decimals']
+            logger.info("Token balance: %s (decimals: %s)", token_amount, decimals)
+            return token_amount, decimals
         
-        logger.warning(f"No token balance found for mint: {mint_str}")
+        logger.warning("No token balance found for mint: %s", mint_str)
         return None
     except Exception as e:
-        logger.error(f"Error getting token balance: {e}")
+        logger.error("Error getting token balance: %s", e)
         return None
 
-def confirm_txn(txn_sig: Signature, max_retries: int = 20, retry_interval: int = 3) -> bool:
-    retries = 1
+def _get_transaction_provider() -> SolanaTransactionProvider:
+    global _transaction_provider
+    if _transaction_provider is None:
+        with _transaction_provider_lock:
+            if _transaction_provider is None:
+                _transaction_provider = SolanaTransactionProvider(SolanaProvider.get_instance())
+    return _transaction_provider
+
+def confirm_txn(
+    txn_sig: Signature,
+    max_retries: int = 20,
+    retry_interval: int = 3,
+    rebroadcast: Optional[Callable[[], None]] = None
+) -> bool:
+    """Wait for a signatureSubscribe notification, polling getTransaction if the subscription fails"""
+    return _get_transaction_provider().confirm_transaction(
+        txn_sig,
+        max_retries=max_retries,
+        retry_interval=retry_interval,
+        rebroadcast=rebroadcast,
+    )
+
+async def confirm_txn_async(
+    txn_sig: Signature,
+    max_retries: int = 20,
+    retry_interval: int = 3,
+    rebroadcast: Optional[Callable[[], Awaitable[None]]] = None
+) -> bool:
+    """Asynchronous variant of confirm_txn that polls with exponential backoff and jitter.
+
+    Polls follow confirm_poll_delays, the schedule confirm_txn uses when it cannot
+    subscribe, within the same max_retries * retry_interval budget.
+    """
+    async_client = AsyncSolanaProvider.get_instance().rpc
+    deadline = time.monotonic() + max_retries * retry_interval
+    delays = confirm_poll_delays(retry_interval)
+    attempt = 1
     
-    logger.info(f"Confirming transaction: {txn_sig}")
+    logger.info("Confirming transaction: %s", txn_sig)
     
-    while retries < max_retries:
+    while True:
         try:
-            txn_res = client.get_transaction(
+            txn_res = await async_client.get_transaction(
                 txn_sig, 
                 encoding="json", 
                 commitment=Confirmed, 
                 max_supported_transaction_version=0)
             
-            txn_json = json.loads(txn_res.value.transaction.meta.to_json())
-            
-            if txn_json['err'] is None:
-                logger.info(f"Transaction confirmed after {retries} attempts")
-                print("Transaction confirmed... try count:", retries)
-                return True
-            
-            logger.warning(f"Transaction not confirmed on attempt {retries}")
-            print("Error: Transaction not confirmed. Retrying...")
-            if txn_json['err']:
-                logger.error(f"Transaction failed with error: {txn_json['err']}")
-                print("Transaction failed.")
+            if txn_res.value is not None:
+                txn_json = json.loads(txn_res.value.transaction.meta.to_json())
+                
+                if txn_json['err'] is None:
+                    logger.info("Transaction confirmed after %s attempts", attempt)
+                    return True
+                
+                logger.error("Transaction failed with error: %s", txn_json['err'])
                 return False
+            logger.debug("Transaction not found yet (attempt %s)", attempt)
         except Exception as e:
-            logger.warning(f"Awaiting confirmation (attempt {retries}): {e}")
-            print("Awaiting confirmation... try count:", retries)
-            retries += 1
-            time.sleep(retry_interval)
+            if is_permanent_rpc_error(e):
+                # The RPC rejected the request itself; polling again cannot succeed
+                logger.error("Transaction confirmation failed: %s", e)
+                return False
+            logger.warning("Awaiting confirmation (attempt %s): %s", attempt, e)
+        
+        sleep_for = next(delays)
+        if time.monotonic() + sleep_for >= deadline:
+            break
+        logger.debug("Awaiting confirmation... try count: %s", attempt)
+        attempt += 1
+        if rebroadcast is not None:
+            await rebroadcast()
+        await asyncio.sleep(sleep_for)
     
-    logger.error(f"Max retries ({max_retries}) reached. Transaction confirmation failed.")
-    print("Max retries reached. Transaction confirmation failed.")
+    logger.error("Confirmation budget exhausted after %s attempts. Transaction confirmation failed.", attempt)
     return False
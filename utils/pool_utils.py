@@ -1,27 +1,201 @@
+import asyncio
+import functools
+import logging
+import random
 import struct
+import threading
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
 from enum import Enum
-from typing import Optional
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
 
+import httpx
+from solana.exceptions import SolanaRpcException
+from solana.rpc.core import RPCException
 from solana.rpc.commitment import Processed
 from solana.rpc.types import MemcmpOpts
+from solders.account_decoder import UiAccountEncoding, UiDataSliceConfig  # type: ignore
+from solders.commitment_config import CommitmentLevel  # type: ignore
 from solders.instruction import AccountMeta, Instruction  # type: ignore
 from solders.pubkey import Pubkey  # type: ignore
+from solders.rpc.config import RpcAccountInfoConfig, RpcProgramAccountsConfig  # type: ignore
+from solders.rpc.errors import (  # type: ignore
+    BlockStatusNotAvailableYetMessage,
+    InternalErrorMessage,
+    MinContextSlotNotReachedMessage,
+    NodeUnhealthyMessage,
+)
+from solders.rpc.filter import Memcmp  # type: ignore
+from solders.rpc.requests import GetProgramAccounts  # type: ignore
+from solders.rpc.responses import GetProgramAccountsResp  # type: ignore
 
 from model.solana_provider import SolanaProvider
-from model.layout_amm_v4 import LIQUIDITY_STATE_LAYOUT_V4, MARKET_STATE_LAYOUT_V3
-from config import config
-
-# Access constants as properties of the config instance
-WSOL = config.WSOL
-TOKEN_PROGRAM_ID = config.TOKEN_PROGRAM_ID
-TOKEN_2022_PROGRAM_ID = config.TOKEN_2022_PROGRAM_ID
-MEMO_PROGRAM_V2 = config.MEMO_PROGRAM_V2
-RAYDIUM_AMM_V4 = config.RAYDIUM_AMM_V4
-DEFAULT_QUOTE_MINT = config.DEFAULT_QUOTE_MINT
-
-@dataclass
+from model.async_solana_provider import AsyncSolanaProvider
+from model.layout_amm_v4 import parse_liquidity_state_v4_keys, parse_market_state_v3_keys
+from config import _pk, get_config
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Constants read from the config instance, resolved on first access so importing this
+# module does not load the configuration
+_CONFIG_CONSTANTS = (
+    "WSOL",
+    "TOKEN_PROGRAM_ID",
+    "TOKEN_2022_PROGRAM_ID",
+    "MEMO_PROGRAM_V2",
+    "RAYDIUM_AMM_V4",
+    "DEFAULT_QUOTE_MINT",
+)
+RAYDIUM_CPMM = Pubkey.from_string("CPMMoo8L3F4NbTegBCKVNunggL7H1ZpdTHKxQB5qKP1C")
+RAYDIUM_CLMM = Pubkey.from_string("CAMMCzo5YL8w4VFF8KVHrK22GGUsp5VTaW7grrKgrWqK")
+
+def __getattr__(name: str):
+    # Legacy module-level constants, e.g. pool_utils.WSOL
+    if name in _CONFIG_CONSTANTS:
+        return getattr(get_config(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Memoized base58 decode for addresses that come back on every call, sharing the config's cache
+pubkey_from_string = _pk
+
+_BASE64_PROCESSED = RpcAccountInfoConfig(encoding=UiAccountEncoding.Base64, commitment=CommitmentLevel.Processed)
+_BASE64_PROCESSED_NO_DATA = RpcAccountInfoConfig(
+    encoding=UiAccountEncoding.Base64, data_slice=UiDataSliceConfig(0, 0), commitment=CommitmentLevel.Processed
+)
+
+# Backoff for rate-limited RPC calls: attempts, first delay and cap, in seconds
+RPC_RETRY_TRIES = 5
+RPC_RETRY_BASE = 0.25
+RPC_RETRY_CAP = 4.0
+# JSON-RPC error code providers answer with when rate limiting; solders has no type for
+# it and returns the bare code instead of raising
+_RATE_LIMIT_RPC_CODE = 429
+
+# RPC errors a later attempt can outlast: node behind or overloaded (-32005), block status
+# or minimum context slot not reached yet, and internal server errors
+_TRANSIENT_RPC_ERRORS = (
+    NodeUnhealthyMessage,
+    BlockStatusNotAvailableYetMessage,
+    MinContextSlotNotReachedMessage,
+    InternalErrorMessage,
+)
+
+_F = TypeVar("_F", bound=Callable)
+
+def is_permanent_rpc_error(e: Exception) -> bool:
+    # True when repeating the request cannot succeed: an RPC error outside the transient
+    # ones above (e.g. -32602 invalid params), or an HTTP 4xx other than 429.
+    # Rate limits, 5xx, timeouts and connection errors are worth retrying
+    if isinstance(e, RPCException):
+        return not (e.args and (isinstance(e.args[0], _TRANSIENT_RPC_ERRORS) or e.args[0] == _RATE_LIMIT_RPC_CODE))
+    cause = e.__cause__ if isinstance(e, SolanaRpcException) else e
+    if isinstance(cause, httpx.HTTPStatusError):
+        status = cause.response.status_code
+        return 400 <= status < 500 and status != 429
+    return False
+
+def _is_rate_limited(e: Exception) -> bool:
+    if isinstance(e, RPCException):
+        # -32005: the node is behind or overloaded. A 429 inside a batch response is not a
+        # known RPC error, so it arrives as the bare code
+        return bool(e.args) and (isinstance(e.args[0], NodeUnhealthyMessage) or e.args[0] == _RATE_LIMIT_RPC_CODE)
+    # solana-py wraps HTTP errors in SolanaRpcException
+    cause = e.__cause__ if isinstance(e, SolanaRpcException) else e
+    return isinstance(cause, httpx.HTTPStatusError) and cause.response.status_code == 429
+
+def _retry_delay(attempt: int, base: float, cap: float) -> float:
+    delay = min(base * 2 ** attempt, cap) + random.uniform(0, 0.1)
+    logger.warning("RPC rate limited, retrying in %.2fs (attempt %d)", delay, attempt + 1)
+    return delay
+
+def _retry_rpc(fn: _F, *, tries: int = RPC_RETRY_TRIES, base: float = RPC_RETRY_BASE, cap: float = RPC_RETRY_CAP) -> _F:
+    # Retry only rate limits, with jittered exponential backoff; other errors reach the caller at once
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        for attempt in range(tries - 1):
+            try:
+                result = fn(*args, **kwargs)
+                if type(result) is not int or result != _RATE_LIMIT_RPC_CODE:
+                    return result
+            except (SolanaRpcException, RPCException, httpx.HTTPStatusError) as e:
+                if not _is_rate_limited(e):
+                    raise
+            time.sleep(_retry_delay(attempt, base, cap))
+        return fn(*args, **kwargs)
+    return wrapper
+
+def _retry_rpc_async(fn: _F, *, tries: int = RPC_RETRY_TRIES, base: float = RPC_RETRY_BASE, cap: float = RPC_RETRY_CAP) -> _F:
+    # _retry_rpc for coroutine functions
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        for attempt in range(tries - 1):
+            try:
+                result = await fn(*args, **kwargs)
+                if type(result) is not int or result != _RATE_LIMIT_RPC_CODE:
+                    return result
+            except (SolanaRpcException, RPCException, httpx.HTTPStatusError) as e:
+                if not _is_rate_limited(e):
+                    raise
+            await asyncio.sleep(_retry_delay(attempt, base, cap))
+        return await fn(*args, **kwargs)
+    return wrapper
+
+# Calls on the shared RPC client, resolved when first used rather than at import
+
+@_retry_rpc
+def _get_account_info(*args, **kwargs):
+    return SolanaProvider.get_instance().rpc.get_account_info(*args, **kwargs)
+
+@_retry_rpc
+def _get_multiple_accounts(*args, **kwargs):
+    return SolanaProvider.get_instance().rpc.get_multiple_accounts(*args, **kwargs)
+
+@_retry_rpc
+def _get_multiple_accounts_json_parsed(*args, **kwargs):
+    return SolanaProvider.get_instance().rpc.get_multiple_accounts_json_parsed(*args, **kwargs)
+
+@_retry_rpc
+def _get_program_accounts(*args, **kwargs):
+    return SolanaProvider.get_instance().rpc.get_program_accounts(*args, **kwargs)
+
+@_retry_rpc
+def _batch(*args, **kwargs):
+    return SolanaProvider.get_instance().batch(*args, **kwargs)
+
+# Swap instruction data layouts, compiled once: discriminator, amounts, ...
+_AMM_V4_SWAP_DATA = struct.Struct('<BQQ')
+_CPMM_SWAP_DISCRIMINATOR = bytes.fromhex("8fbe5adac41e33de")
+_CPMM_SWAP_DATA = struct.Struct('<8sQQ')
+_CLMM_SWAP_V2_DISCRIMINATOR = bytes.fromhex("2b04ed0b1ac91e62")
+_CLMM_SWAP_V2_DATA = struct.Struct('<8sQQ16s?')
+
+@dataclass(frozen=True)
 class AmmV4PoolKeys:
+    # Cached and shared across swaps, so keep it immutable and compact
+    __slots__ = (
+        "amm_id",
+        "base_mint",
+        "quote_mint",
+        "base_decimals",
+        "quote_decimals",
+        "open_orders",
+        "target_orders",
+        "base_vault",
+        "quote_vault",
+        "market_id",
+        "market_authority",
+        "market_base_vault",
+        "market_quote_vault",
+        "bids",
+        "asks",
+        "event_queue",
+        "ray_authority_v4",
+        "open_book_program",
+        "token_program_id",
+    )
+
     amm_id: Pubkey
     base_mint: Pubkey
     quote_mint: Pubkey
@@ -42,8 +216,34 @@ class AmmV4PoolKeys:
     open_book_program: Pubkey
     token_program_id: Pubkey
 
-@dataclass
+@dataclass(frozen=True)
 class CpmmPoolKeys:
+    __slots__ = (
+        "pool_state",
+        "raydium_vault_auth_2",
+        "amm_config",
+        "pool_creator",
+        "token_0_vault",
+        "token_1_vault",
+        "lp_mint",
+        "token_0_mint",
+        "token_1_mint",
+        "token_0_program",
+        "token_1_program",
+        "observation_key",
+        "auth_bump",
+        "status",
+        "lp_mint_decimals",
+        "mint_0_decimals",
+        "mint_1_decimals",
+        "lp_supply",
+        "protocol_fees_token_0",
+        "protocol_fees_token_1",
+        "fund_fees_token_0",
+        "fund_fees_token_1",
+        "open_time",
+    )
+
     pool_state: Pubkey
     raydium_vault_auth_2: Pubkey
     amm_config: Pubkey
@@ -68,8 +268,46 @@ class CpmmPoolKeys:
     fund_fees_token_1: int
     open_time: int
 
-@dataclass
+@dataclass(frozen=True)
 class ClmmPoolKeys:
+    __slots__ = (
+        "pool_state",
+        "amm_config",
+        "owner",
+        "token_mint_0",
+        "token_mint_1",
+        "token_vault_0",
+        "token_vault_1",
+        "observation_key",
+        "current_tick_array",
+        "next_tick_array_1",
+        "next_tick_array_2",
+        "bitmap_extension",
+        "mint_decimals_0",
+        "mint_decimals_1",
+        "tick_spacing",
+        "liquidity",
+        "sqrt_price_x64",
+        "tick_current",
+        "observation_index",
+        "observation_update_duration",
+        "fee_growth_global_0_x64",
+        "fee_growth_global_1_x64",
+        "protocol_fees_token_0",
+        "protocol_fees_token_1",
+        "swap_in_amount_token_0",
+        "swap_out_amount_token_1",
+        "swap_in_amount_token_1",
+        "swap_out_amount_token_0",
+        "status",
+        "total_fees_token_0",
+        "total_fees_claimed_token_0",
+        "total_fees_token_1",
+        "total_fees_claimed_token_1",
+        "fund_fees_token_0",
+        "fund_fees_token_1",
+    )
+
     pool_state: Pubkey
     amm_config: Pubkey
     owner: Pubkey
@@ -110,60 +348,134 @@ class DIRECTION(Enum):
     BUY = 0
     SELL = 1
 
+# Pool keys rarely change for a given AMM, so they are reused for POOL_KEYS_TTL seconds.
+# Entries are (expiry, pool keys); the least recently used go beyond POOL_KEYS_CACHE_SIZE.
+# Expired entries stay until evicted so their market can be reloaded together with the AMM.
+POOL_KEYS_TTL = 600
+POOL_KEYS_CACHE_SIZE = 1024
+_AMM_V4_POOL_KEYS_CACHE: "OrderedDict[str, Tuple[float, AmmV4PoolKeys]]" = OrderedDict()
+_AMM_V4_POOL_KEYS_LOCK = threading.Lock()
+
+def get_cached_amm_v4_pool_keys(pair_address: str) -> Optional[AmmV4PoolKeys]:
+    with _AMM_V4_POOL_KEYS_LOCK:
+        entry = _AMM_V4_POOL_KEYS_CACHE.get(pair_address)
+        if entry is None:
+            return None
+        if time.monotonic() >= entry[0]:
+            return None
+        _AMM_V4_POOL_KEYS_CACHE.move_to_end(pair_address)
+        return entry[1]
+
+def _cached_amm_v4_market_id(pair_address: str) -> Optional[Pubkey]:
+    # Market of an AMM seen before, even once its pool keys expired, so reloading them
+    # reads both accounts in one call
+    with _AMM_V4_POOL_KEYS_LOCK:
+        entry = _AMM_V4_POOL_KEYS_CACHE.get(pair_address)
+        return entry[1].market_id if entry is not None else None
+
+def cache_amm_v4_pool_keys(pair_address: str, pool_keys: AmmV4PoolKeys) -> None:
+    with _AMM_V4_POOL_KEYS_LOCK:
+        _AMM_V4_POOL_KEYS_CACHE[pair_address] = (time.monotonic() + POOL_KEYS_TTL, pool_keys)
+        _AMM_V4_POOL_KEYS_CACHE.move_to_end(pair_address)
+        while len(_AMM_V4_POOL_KEYS_CACHE) > POOL_KEYS_CACHE_SIZE:
+            _AMM_V4_POOL_KEYS_CACHE.popitem(last=False)
+        _AMM_V4_ACCOUNT_DATA.pop(pair_address, None)
+
+# AMM account data returned by pair scans, held until the pair's pool keys are decoded.
+# Entries are (expiry, data), bounded like the pool keys and guarded by the same lock.
+_AMM_V4_ACCOUNT_DATA: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+
+def get_scanned_amm_v4_account_data(pair_address: str) -> Optional[bytes]:
+    with _AMM_V4_POOL_KEYS_LOCK:
+        entry = _AMM_V4_ACCOUNT_DATA.get(pair_address)
+        if entry is None:
+            return None
+        if time.monotonic() >= entry[0]:
+            del _AMM_V4_ACCOUNT_DATA[pair_address]
+            return None
+        return entry[1]
+
+def invalidate_pool(pair_address: str) -> None:
+    # For callers that saw a swap fail and suspect stale pool keys
+    with _AMM_V4_POOL_KEYS_LOCK:
+        _AMM_V4_POOL_KEYS_CACHE.pop(pair_address, None)
+        _AMM_V4_ACCOUNT_DATA.pop(pair_address, None)
+
+_PACK_U64 = struct.Struct('<Q').pack
+
+@functools.lru_cache(maxsize=4096)
+def _market_authority(market_id: bytes, vault_signer_nonce: int) -> Pubkey:
+    # Deterministic per market, so reloading a pool's keys skips the PDA derivation
+    return Pubkey.create_program_address(
+        seeds=[market_id, _PACK_U64(vault_signer_nonce)], program_id=get_config().OPENBOOK_PROGRAM_ID
+    )
+
+def decode_amm_v4_pool_keys(amm_id: Pubkey, amm_data: bytes, market_data: bytes) -> AmmV4PoolKeys:
+    
+    amm_data_decoded = parse_liquidity_state_v4_keys(amm_data)
+    marketId = Pubkey.from_bytes(amm_data_decoded.serumMarket)
+    market_decoded = parse_market_state_v3_keys(market_data)
+    
+    config = get_config()
+    return AmmV4PoolKeys(
+        amm_id=amm_id,
+        base_mint=Pubkey.from_bytes(market_decoded.base_mint),
+        quote_mint=Pubkey.from_bytes(market_decoded.quote_mint),
+        base_decimals=amm_data_decoded.coinDecimals,
+        quote_decimals=amm_data_decoded.pcDecimals,
+        open_orders=Pubkey.from_bytes(amm_data_decoded.ammOpenOrders),
+        target_orders=Pubkey.from_bytes(amm_data_decoded.ammTargetOrders),
+        base_vault=Pubkey.from_bytes(amm_data_decoded.poolCoinTokenAccount),
+        quote_vault=Pubkey.from_bytes(amm_data_decoded.poolPcTokenAccount),
+        market_id=marketId,
+        market_authority=_market_authority(amm_data_decoded.serumMarket, market_decoded.vault_signer_nonce),
+        market_base_vault=Pubkey.from_bytes(market_decoded.base_vault),
+        market_quote_vault=Pubkey.from_bytes(market_decoded.quote_vault),
+        bids=Pubkey.from_bytes(market_decoded.bids),
+        asks=Pubkey.from_bytes(market_decoded.asks),
+        event_queue=Pubkey.from_bytes(market_decoded.event_queue),
+        ray_authority_v4=config.RAY_AUTHORITY_V4,
+        open_book_program=config.OPENBOOK_PROGRAM_ID,
+        token_program_id=config.TOKEN_PROGRAM_ID
+    )
+
 def fetch_amm_v4_pool_keys(pair_address: str) -> Optional[AmmV4PoolKeys]:
     
-    def bytes_of(value):
-        if not (0 <= value < 2**64):
-            raise ValueError("Value must be in the range of a u64 (0 to 2^64 - 1).")
-        return struct.pack('<Q', value)
+    pool_keys = get_cached_amm_v4_pool_keys(pair_address)
+    if pool_keys is not None:
+        return pool_keys
    
     try:
-        amm_id = Pubkey.from_string(pair_address)
-        amm_data = SolanaProvider.get_instance().rpc.get_account_info_json_parsed(amm_id, commitment=Processed).value.data
-        amm_data_decoded = LIQUIDITY_STATE_LAYOUT_V4.parse(amm_data)
-        marketId = Pubkey.from_bytes(amm_data_decoded.serumMarket)
-        marketInfo = SolanaProvider.get_instance().rpc.get_account_info_json_parsed(marketId, commitment=Processed).value.data
-        market_decoded = MARKET_STATE_LAYOUT_V3.parse(marketInfo)
-        vault_signer_nonce = market_decoded.vault_signer_nonce
-        
-        pool_keys = AmmV4PoolKeys(
-            amm_id=amm_id,
-            base_mint=Pubkey.from_bytes(market_decoded.base_mint),
-            quote_mint=Pubkey.from_bytes(market_decoded.quote_mint),
-            base_decimals=amm_data_decoded.coinDecimals,
-            quote_decimals=amm_data_decoded.pcDecimals,
-            open_orders=Pubkey.from_bytes(amm_data_decoded.ammOpenOrders),
-            target_orders=Pubkey.from_bytes(amm_data_decoded.ammTargetOrders),
-            base_vault=Pubkey.from_bytes(amm_data_decoded.poolCoinTokenAccount),
-            quote_vault=Pubkey.from_bytes(amm_data_decoded.poolPcTokenAccount),
-            market_id=marketId,
-            market_authority=Pubkey.create_program_address(seeds=[bytes(marketId), bytes_of(vault_signer_nonce)], program_id=config.OPENBOOK_PROGRAM_ID),
-            market_base_vault=Pubkey.from_bytes(market_decoded.base_vault),
-            market_quote_vault=Pubkey.from_bytes(market_decoded.quote_vault),
-            bids=Pubkey.from_bytes(market_decoded.bids),
-            asks=Pubkey.from_bytes(market_decoded.asks),
-            event_queue=Pubkey.from_bytes(market_decoded.event_queue),
-            ray_authority_v4=config.RAY_AUTHORITY_V4,
-            open_book_program=config.OPENBOOK_PROGRAM_ID,
-            token_program_id=config.TOKEN_PROGRAM_ID
-        )
-
+        amm_id = pubkey_from_string(pair_address)
+        amm_data = get_scanned_amm_v4_account_data(pair_address)
+        cached_market_id = _cached_amm_v4_market_id(pair_address)
+        marketInfo = None
+        if amm_data is None and cached_market_id is not None:
+            amm_account, market_account = _get_multiple_accounts([amm_id, cached_market_id], commitment=Processed).value
+            amm_data = amm_account.data
+            marketInfo = market_account.data if market_account is not None else None
+        elif amm_data is None:
+            amm_data = _get_account_info(amm_id, commitment=Processed).value.data
+        marketId = Pubkey.from_bytes(parse_liquidity_state_v4_keys(amm_data).serumMarket)
+        if marketInfo is None or marketId != cached_market_id:
+            # First sighting of this AMM, or it moved to another market
+            marketInfo = _get_account_info(marketId, commitment=Processed).value.data
+        pool_keys = decode_amm_v4_pool_keys(amm_id, amm_data, marketInfo)
+        cache_amm_v4_pool_keys(pair_address, pool_keys)
         return pool_keys
     except Exception as e:
-        print(f"Error fetching AMMv4 pool keys: {e}")
+        logger.error("Error fetching AMMv4 pool keys: %s", e)
         return None
     
-def make_amm_v4_swap_instruction(
-    amount_in: int, 
-    minimum_amount_out: int, 
-    token_account_in: Pubkey, 
-    token_account_out: Pubkey, 
-    accounts: AmmV4PoolKeys,
-    owner: Pubkey
-) -> Instruction:
-    try:
-        
-        keys = [
+# Pool-constant AccountMetas of swap instructions, built once per pool. Entries hold the
+# pool keys they were built from and are rebuilt when a pool's keys are reloaded.
+_AMM_V4_SWAP_KEYS: Dict[Pubkey, Tuple[AmmV4PoolKeys, List[AccountMeta]]] = {}
+_CPMM_SWAP_KEYS: Dict[Tuple[Pubkey, DIRECTION], Tuple[CpmmPoolKeys, List[AccountMeta], List[AccountMeta]]] = {}
+
+def _amm_v4_swap_keys_template(accounts: AmmV4PoolKeys) -> List[AccountMeta]:
+    entry = _AMM_V4_SWAP_KEYS.get(accounts.amm_id)
+    if entry is None or entry[0] is not accounts:
+        template = [
             AccountMeta(pubkey=accounts.token_program_id, is_signer=False, is_writable=False),
             AccountMeta(pubkey=accounts.amm_id, is_signer=False, is_writable=True),
             AccountMeta(pubkey=accounts.ray_authority_v4, is_signer=False, is_writable=False),
@@ -179,34 +491,16 @@ def make_amm_v4_swap_instruction(
             AccountMeta(pubkey=accounts.market_base_vault, is_signer=False, is_writable=True),
             AccountMeta(pubkey=accounts.market_quote_vault, is_signer=False, is_writable=True),
             AccountMeta(pubkey=accounts.market_authority, is_signer=False, is_writable=False),
-            AccountMeta(pubkey=token_account_in, is_signer=False, is_writable=True),  
-            AccountMeta(pubkey=token_account_out, is_signer=False, is_writable=True), 
-            AccountMeta(pubkey=owner, is_signer=True, is_writable=False) 
         ]
-        
-        data = bytearray()
-        discriminator = 9
-        data.extend(struct.pack('<B', discriminator))
-        data.extend(struct.pack('<Q', amount_in))
-        data.extend(struct.pack('<Q', minimum_amount_out))
-        swap_instruction = Instruction(RAYDIUM_AMM_V4, bytes(data), keys)
-        
-        return swap_instruction
-    except Exception as e:
-        print(f"Error occurred: {e}")
-        return None
+        if len(_AMM_V4_SWAP_KEYS) >= POOL_KEYS_CACHE_SIZE:
+            _AMM_V4_SWAP_KEYS.clear()
+        entry = _AMM_V4_SWAP_KEYS[accounts.amm_id] = (accounts, template)
+    return entry[1]
 
-def make_cpmm_swap_instruction( 
-    amount_in: int, 
-    minimum_amount_out: int, 
-    token_account_in: Pubkey, 
-    token_account_out: Pubkey, 
-    accounts: CpmmPoolKeys,
-    owner: Pubkey,
-    action: DIRECTION
-) -> Instruction:
-    try:
-        
+def _cpmm_swap_keys_template(accounts: CpmmPoolKeys, action: DIRECTION) -> Tuple[List[AccountMeta], List[AccountMeta]]:
+    # The token accounts sit in the middle of the CPMM key list, so the template is split around them
+    entry = _CPMM_SWAP_KEYS.get((accounts.pool_state, action))
+    if entry is None or entry[0] is not accounts:
         if action == DIRECTION.BUY:
             input_vault = accounts.token_0_vault
             output_vault = accounts.token_1_vault
@@ -222,13 +516,12 @@ def make_cpmm_swap_instruction(
             input_token_mint = accounts.token_1_mint
             output_token_mint = accounts.token_0_mint
         
-        keys = [
-            AccountMeta(pubkey=owner, is_signer=True, is_writable=True), 
+        head = [
             AccountMeta(pubkey=accounts.raydium_vault_auth_2, is_signer=False, is_writable=False),
             AccountMeta(pubkey=accounts.amm_config, is_signer=False, is_writable=False),
             AccountMeta(pubkey=accounts.pool_state, is_signer=False, is_writable=True),
-            AccountMeta(pubkey=token_account_in, is_signer=False, is_writable=True),
-            AccountMeta(pubkey=token_account_out, is_signer=False, is_writable=True),
+        ]
+        tail = [
             AccountMeta(pubkey=input_vault, is_signer=False, is_writable=True),
             AccountMeta(pubkey=output_vault, is_signer=False, is_writable=True),
             AccountMeta(pubkey=input_token_program, is_signer=False, is_writable=False),
@@ -237,16 +530,61 @@ def make_cpmm_swap_instruction(
             AccountMeta(pubkey=output_token_mint, is_signer=False, is_writable=False),
             AccountMeta(pubkey=accounts.observation_key, is_signer=False, is_writable=True)
         ]
+        if len(_CPMM_SWAP_KEYS) >= POOL_KEYS_CACHE_SIZE:
+            _CPMM_SWAP_KEYS.clear()
+        entry = _CPMM_SWAP_KEYS[(accounts.pool_state, action)] = (accounts, head, tail)
+    return entry[1], entry[2]
+
+def make_amm_v4_swap_instruction(
+    amount_in: int, 
+    minimum_amount_out: int, 
+    token_account_in: Pubkey, 
+    token_account_out: Pubkey, 
+    accounts: AmmV4PoolKeys,
+    owner: Pubkey
+) -> Instruction:
+    try:
+        
+        keys = _amm_v4_swap_keys_template(accounts) + [
+            AccountMeta(pubkey=token_account_in, is_signer=False, is_writable=True),  
+            AccountMeta(pubkey=token_account_out, is_signer=False, is_writable=True), 
+            AccountMeta(pubkey=owner, is_signer=True, is_writable=False) 
+        ]
         
-        data = bytearray()
-        data.extend(bytes.fromhex("8fbe5adac41e33de"))
-        data.extend(struct.pack('<Q', amount_in))
-        data.extend(struct.pack('<Q', minimum_amount_out))
-        swap_instruction = Instruction(RAYDIUM_CPMM, bytes(data), keys)
+        data = _AMM_V4_SWAP_DATA.pack(9, amount_in, minimum_amount_out)
+        swap_instruction = Instruction(get_config().RAYDIUM_AMM_V4, data, keys)
         
         return swap_instruction
     except Exception as e:
-        print(f"Error occurred: {e}")
+        logger.error("Error occurred: %s", e)
+        return None
+
+def make_cpmm_swap_instruction( 
+    amount_in: int, 
+    minimum_amount_out: int, 
+    token_account_in: Pubkey, 
+    token_account_out: Pubkey, 
+    accounts: CpmmPoolKeys,
+    owner: Pubkey,
+    action: DIRECTION
+) -> Instruction:
+    try:
+        
+        head, tail = _cpmm_swap_keys_template(accounts, action)
+        keys = [
+            AccountMeta(pubkey=owner, is_signer=True, is_writable=True), 
+            *head,
+            AccountMeta(pubkey=token_account_in, is_signer=False, is_writable=True),
+            AccountMeta(pubkey=token_account_out, is_signer=False, is_writable=True),
+            *tail,
+        ]
+        
+        data = _CPMM_SWAP_DATA.pack(_CPMM_SWAP_DISCRIMINATOR, amount_in, minimum_amount_out)
+        swap_instruction = Instruction(RAYDIUM_CPMM, data, keys)
+        
+        return swap_instruction
+    except Exception as e:
+        logger.error("Error occurred: %s", e)
         return None
 
 def make_clmm_swap_instruction( 
@@ -258,7 +596,7 @@ def make_clmm_swap_instruction(
     action: DIRECTION
 ) -> Instruction:
     try:
-        
+        config = get_config()
         if action == DIRECTION.BUY:
             input_vault = accounts.token_vault_0
             output_vault = accounts.token_vault_1
@@ -280,9 +618,9 @@ def make_clmm_swap_instruction(
             AccountMeta(pubkey=input_vault, is_signer=False, is_writable=True),
             AccountMeta(pubkey=output_vault, is_signer=False, is_writable=True),
             AccountMeta(pubkey=accounts.observation_key, is_signer=False, is_writable=True),
-            AccountMeta(pubkey=TOKEN_PROGRAM_ID, is_signer=False, is_writable=False),
-            AccountMeta(pubkey=TOKEN_2022_PROGRAM_ID, is_signer=False, is_writable=False),
-            AccountMeta(pubkey=MEMO_PROGRAM_V2, is_signer=False, is_writable=False),
+            AccountMeta(pubkey=config.TOKEN_PROGRAM_ID, is_signer=False, is_writable=False),
+            AccountMeta(pubkey=config.TOKEN_2022_PROGRAM_ID, is_signer=False, is_writable=False),
+            AccountMeta(pubkey=config.MEMO_PROGRAM_V2, is_signer=False, is_writable=False),
             AccountMeta(pubkey=input_mint, is_signer=False, is_writable=False),
             AccountMeta(pubkey=output_mint, is_signer=False, is_writable=False),
             AccountMeta(pubkey=accounts.current_tick_array, is_signer=False, is_writable=True),
@@ -291,30 +629,23 @@ def make_clmm_swap_instruction(
             AccountMeta(pubkey=accounts.next_tick_array_2, is_signer=False, is_writable=True)
         ]
         
-        data = bytearray()
-        data.extend(bytes.fromhex("2b04ed0b1ac91e62")) #SWAP V2
-        data.extend(struct.pack('<Q', amount))
-        data.extend(struct.pack('<Q', 0))
-        data.extend((0).to_bytes(16, byteorder='little'))
-        data.extend(struct.pack('<?', True))
-        swap_instruction = Instruction(Pubkey.from_string("CAMMCzo5YL8w4VFF8KVHrK22GGUsp5VTaW7grrKgrWqK"), bytes(data), keys)
+        # amount, other_amount_threshold = 0, sqrt_price_limit_x64 = 0, is_base_input = True
+        data = _CLMM_SWAP_V2_DATA.pack(_CLMM_SWAP_V2_DISCRIMINATOR, amount, 0, bytes(16), True)
+        swap_instruction = Instruction(RAYDIUM_CLMM, data, keys)
         
         return swap_instruction
     except Exception as e:
-        print(f"Error occurred: {e}")
+        logger.error("Error occurred: %s", e)
         return None
 
 def get_amm_v4_reserves(pool_keys: AmmV4PoolKeys) -> tuple:
+    # A separate round trip; prefer fetch_pool_bundle when the pool keys are fetched too.
+    # Reserves are raw amounts in base units, as in fetch_pool_bundle
     try:
         quote_vault = pool_keys.quote_vault
-        quote_decimal = pool_keys.quote_decimals
-        quote_mint = pool_keys.quote_mint
-        
         base_vault = pool_keys.base_vault
-        base_decimal = pool_keys.base_decimals
-        base_mint = pool_keys.base_mint
         
-        balances_response = SolanaProvider.get_instance().rpc.get_multiple_accounts_json_parsed(
+        balances_response = _get_multiple_accounts_json_parsed(
             [quote_vault, base_vault], 
             Processed
         )
@@ -323,71 +654,369 @@ def get_amm_v4_reserves(pool_keys: AmmV4PoolKeys) -> tuple:
         quote_account = balances[0]
         base_account = balances[1]
         
-        quote_account_balance = quote_account.data.parsed['info']['tokenAmount']['uiAmount']
-        base_account_balance = base_account.data.parsed['info']['tokenAmount']['uiAmount']
-        
-        if quote_account_balance is None or base_account_balance is None:
-            print("Error: One of the account balances is None.")
-            return None, None, None
+        quote_account_balance = int(quote_account.data.parsed['info']['tokenAmount']['amount'])
+        base_account_balance = int(base_account.data.parsed['info']['tokenAmount']['amount'])
         
-        if base_mint == WSOL:
-            base_reserve = quote_account_balance  
-            quote_reserve = base_account_balance  
-            token_decimal = quote_decimal 
-        else:
-            base_reserve = base_account_balance  
-            quote_reserve = quote_account_balance
-            token_decimal = base_decimal
-
-        print(f"Base Mint: {base_mint} | Quote Mint: {quote_mint}")
-        print(f"Base Reserve: {base_reserve} | Quote Reserve: {quote_reserve} | Token Decimal: {token_decimal}")
-        return base_reserve, quote_reserve, token_decimal
+        return amm_v4_reserves_from_balances(pool_keys, base_account_balance, quote_account_balance)
 
     except Exception as e:
-        print(f"Error occurred: {e}")
+        logger.error("Error occurred: %s", e)
         return None, None, None
 
-def fetch_pair_address_from_rpc(
+def amm_v4_reserves_from_balances(pool_keys: AmmV4PoolKeys, base_account_balance: int, quote_account_balance: int) -> tuple:
+    quote_decimal = pool_keys.quote_decimals
+    quote_mint = pool_keys.quote_mint
+    
+    base_decimal = pool_keys.base_decimals
+    base_mint = pool_keys.base_mint
+    
+    if quote_account_balance is None or base_account_balance is None:
+        logger.error("One of the account balances is None.")
+        return None, None, None
+    
+    if base_mint == get_config().WSOL:
+        base_reserve = quote_account_balance  
+        quote_reserve = base_account_balance  
+        token_decimal = quote_decimal 
+    else:
+        base_reserve = base_account_balance  
+        quote_reserve = quote_account_balance
+        token_decimal = base_decimal
+
+    logger.debug("Base Mint: %s | Quote Mint: %s", base_mint, quote_mint)
+    logger.debug("Base Reserve: %s | Quote Reserve: %s | Token Decimal: %s", base_reserve, quote_reserve, token_decimal)
+    return base_reserve, quote_reserve, token_decimal
+
+# Raydium AMM v4 trade fee (25 / 10000), charged on the input amount
+AMM_V4_FEE_BPS = 25
+
+def amm_v4_out(amount_in: int, reserve_in: int, reserve_out: int, fee_bps: int = AMM_V4_FEE_BPS) -> int:
+    # Constant product with the fee taken from the input, floor-divided like the program's
+    # u128 math. Kept in Python ints: reserve * amount overflows int64 at real pool sizes
+    amount_in_after_fee = amount_in * (10_000 - fee_bps) // 10_000
+    return reserve_out * amount_in_after_fee // (reserve_in + amount_in_after_fee)
+
+def token_account_amount(data: bytes) -> int:
+    # SPL token account layout: mint (32) | owner (32) | amount (u64 LE) | ...
+    return struct.unpack_from('<Q', data, 64)[0]
+
+def fetch_pool_bundle(pair_address: str) -> tuple:
+    # Pool keys and reserves (in base units) in one getMultipleAccounts for a known pool,
+    # where fetch_amm_v4_pool_keys + get_amm_v4_reserves take two or three calls
+    try:
+        pool_keys = get_cached_amm_v4_pool_keys(pair_address)
+        if pool_keys is not None:
+            base_account, quote_account = _get_multiple_accounts(
+                [pool_keys.base_vault, pool_keys.quote_vault], commitment=Processed
+            ).value
+        else:
+            # The vaults are only known from the AMM state, unless a pair scan returned it
+            amm_id = pubkey_from_string(pair_address)
+            amm_data = get_scanned_amm_v4_account_data(pair_address)
+            if amm_data is None:
+                amm_data = _get_account_info(amm_id, commitment=Processed).value.data
+            amm_decoded = parse_liquidity_state_v4_keys(amm_data)
+            market_account, base_account, quote_account = _get_multiple_accounts(
+                [
+                    Pubkey.from_bytes(amm_decoded.serumMarket),
+                    Pubkey.from_bytes(amm_decoded.poolCoinTokenAccount),
+                    Pubkey.from_bytes(amm_decoded.poolPcTokenAccount),
+                ],
+                commitment=Processed,
+            ).value
+            pool_keys = decode_amm_v4_pool_keys(amm_id, amm_data, market_account.data)
+            cache_amm_v4_pool_keys(pair_address, pool_keys)
+        
+        base_reserve, quote_reserve, token_decimal = amm_v4_reserves_from_balances(
+            pool_keys, token_account_amount(base_account.data), token_account_amount(quote_account.data)
+        )
+        return pool_keys, base_reserve, quote_reserve, token_decimal
+    except Exception as e:
+        logger.error("Error fetching AMMv4 pool bundle: %s", e)
+        return None, None, None, None
+
+def _pair_requests(
     program_id: Pubkey, 
     token_mint: str, 
     quote_offset: int, 
     base_offset: int, 
-    data_length: int
+    data_length: int,
+    with_data: bool
+) -> Tuple[tuple, tuple]:
+    # getProgramAccounts for both mint orders, as (requests, parsers) for one batch.
+    # Without data, a zero-length slice makes the RPC return only the account addresses
+    account_config = _BASE64_PROCESSED if with_data else _BASE64_PROCESSED_NO_DATA
+    default_quote_mint = get_config().DEFAULT_QUOTE_MINT
+
+    def pair_request(base_mint: str, quote_mint: str, request_id: int) -> GetProgramAccounts:
+        filters = [
+            data_length,
+            Memcmp(offset=quote_offset, bytes_=quote_mint),
+            Memcmp(offset=base_offset, bytes_=base_mint),
+        ]
+        return GetProgramAccounts(program_id, RpcProgramAccountsConfig(account_config, filters), id=request_id)
+
+    return (
+        (pair_request(token_mint, default_quote_mint, 0), pair_request(default_quote_mint, token_mint, 1)),
+        (GetProgramAccountsResp, GetProgramAccountsResp),
+    )
+
+def fetch_pair_accounts_from_rpc(
+    program_id: Pubkey, 
+    token_mint: str, 
+    quote_offset: int, 
+    base_offset: int, 
+    data_length: int,
+    with_data: bool = True
 ) -> list:
+    try:
+        pubkey_from_string(token_mint)
+    except ValueError:
+        logger.error("Invalid token mint address: %s", token_mint)
+        return []
+    default_quote_mint = get_config().DEFAULT_QUOTE_MINT
 
     def fetch_pair(base_mint: str, quote_mint: str) -> list:
         memcmp_filter_base = MemcmpOpts(offset=quote_offset, bytes=quote_mint)
         memcmp_filter_quote = MemcmpOpts(offset=base_offset, bytes=base_mint)
         try:
-            print(f"Fetching pair addresses for base_mint: {base_mint}, quote_mint: {quote_mint}")
-            response = SolanaProvider.get_instance().rpc.get_program_accounts(
+            logger.debug("Fetching pair addresses for base_mint: %s, quote_mint: %s", base_mint, quote_mint)
+            response = _get_program_accounts(
                 program_id,
                 commitment=Processed,
                 filters=[data_length, memcmp_filter_base, memcmp_filter_quote],
             )
             accounts = response.value
             if accounts:
-                print(f"Found {len(accounts)} matching AMM account(s).")
-                return [account.pubkey.__str__() for account in accounts]
+                logger.debug("Found %d matching AMM account(s).", len(accounts))
+                return list(accounts)
             else:
-                print("No matching AMM accounts found.")
+                logger.debug("No matching AMM accounts found.")
         except Exception as e:
-            print(f"Error fetching AMM pair addresses: {e}")
+            logger.error("Error fetching AMM pair addresses: %s", e)
         return []
 
-    pair_addresses = fetch_pair(token_mint, DEFAULT_QUOTE_MINT)
+    # Query both mint orders in one batch instead of retrying the reversed order after a miss
+    try:
+        logger.debug("Fetching pair addresses for mints %s and %s in both orders", token_mint, default_quote_mint)
+        direct, reversed_ = _batch(
+            *_pair_requests(program_id, token_mint, quote_offset, base_offset, data_length, with_data)
+        )
+        pair_accounts = list(direct.value) or list(reversed_.value)
+        if pair_accounts:
+            logger.debug("Found %d matching AMM account(s).", len(pair_accounts))
+        else:
+            logger.debug("No matching AMM accounts found.")
+        return pair_accounts
+    except Exception as e:
+        # One order failing must not hide the other, so query them separately and with
+        # full account data, in case the RPC rejected the data slice
+        logger.warning("Batched AMM pair lookup failed, querying each order: %s", e)
 
-    if not pair_addresses:
-        print("Retrying with reversed base and quote mints...")
-        pair_addresses = fetch_pair(DEFAULT_QUOTE_MINT, token_mint)
+    pair_accounts = fetch_pair(token_mint, default_quote_mint)
 
-    return pair_addresses
+    if not pair_accounts:
+        logger.debug("Retrying with reversed base and quote mints...")
+        pair_accounts = fetch_pair(default_quote_mint, token_mint)
+
+    return pair_accounts
+
+def fetch_pair_address_from_rpc(
+    program_id: Pubkey, 
+    token_mint: str, 
+    quote_offset: int, 
+    base_offset: int, 
+    data_length: int
+) -> list:
+    pair_accounts = fetch_pair_accounts_from_rpc(
+        program_id, token_mint, quote_offset, base_offset, data_length, with_data=False
+    )
+    return [str(account.pubkey) for account in pair_accounts]
 
 def get_amm_v4_pair_from_rpc(token_mint: str) -> list:
-    return fetch_pair_address_from_rpc(
-        program_id=RAYDIUM_AMM_V4,
+    pair_accounts = fetch_pair_accounts_from_rpc(
+        program_id=get_config().RAYDIUM_AMM_V4,
+        token_mint=token_mint,
+        quote_offset=400,
+        base_offset=432,
+        data_length=752,
+    )
+    return _keep_scanned_amm_v4_accounts(pair_accounts)
+
+def _keep_scanned_amm_v4_accounts(pair_accounts: list) -> list:
+    # Keep the scanned AMM state so a swap on any returned pair skips its AMM fetch
+    pair_addresses = [str(account.pubkey) for account in pair_accounts]
+    unknown = [
+        (pair_address, account.account.data)
+        for pair_address, account in zip(pair_addresses, pair_accounts)
+        if get_cached_amm_v4_pool_keys(pair_address) is None
+    ]
+    expiry = time.monotonic() + POOL_KEYS_TTL
+    with _AMM_V4_POOL_KEYS_LOCK:
+        for pair_address, data in unknown:
+            _AMM_V4_ACCOUNT_DATA[pair_address] = (expiry, data)
+            _AMM_V4_ACCOUNT_DATA.move_to_end(pair_address)
+        while len(_AMM_V4_ACCOUNT_DATA) > POOL_KEYS_CACHE_SIZE:
+            _AMM_V4_ACCOUNT_DATA.popitem(last=False)
+    return pair_addresses
+
+# Asynchronous variants over the shared AsyncSolanaProvider, so one event loop can
+# load many pools concurrently. They share the caches above with the sync functions.
+
+async def fetch_amm_v4_pool_keys_async(pair_address: str) -> Optional[AmmV4PoolKeys]:
+    
+    pool_keys = get_cached_amm_v4_pool_keys(pair_address)
+    if pool_keys is not None:
+        return pool_keys
+    
+    rpc = AsyncSolanaProvider.get_instance().rpc
+    try:
+        amm_id = pubkey_from_string(pair_address)
+        amm_data = get_scanned_amm_v4_account_data(pair_address)
+        cached_market_id = _cached_amm_v4_market_id(pair_address)
+        marketInfo = None
+        if amm_data is None and cached_market_id is not None:
+            amm_account, market_account = (
+                await _retry_rpc_async(rpc.get_multiple_accounts)([amm_id, cached_market_id], commitment=Processed)
+            ).value
+            amm_data = amm_account.data
+            marketInfo = market_account.data if market_account is not None else None
+        elif amm_data is None:
+            amm_data = (await _retry_rpc_async(rpc.get_account_info)(amm_id, commitment=Processed)).value.data
+        marketId = Pubkey.from_bytes(parse_liquidity_state_v4_keys(amm_data).serumMarket)
+        if marketInfo is None or marketId != cached_market_id:
+            marketInfo = (await _retry_rpc_async(rpc.get_account_info)(marketId, commitment=Processed)).value.data
+        pool_keys = decode_amm_v4_pool_keys(amm_id, amm_data, marketInfo)
+        cache_amm_v4_pool_keys(pair_address, pool_keys)
+        return pool_keys
+    except Exception as e:
+        logger.error("Error fetching AMMv4 pool keys: %s", e)
+        return None
+
+async def fetch_amm_v4_pool_keys_many_async(pair_addresses: List[str]) -> List[Optional[AmmV4PoolKeys]]:
+    # All cold pools are fetched concurrently, so N pools cost about one pool's round trips
+    return list(await asyncio.gather(*(fetch_amm_v4_pool_keys_async(pair) for pair in pair_addresses)))
+
+async def get_amm_v4_reserves_async(pool_keys: AmmV4PoolKeys) -> tuple:
+    rpc = AsyncSolanaProvider.get_instance().rpc
+    try:
+        base_account, quote_account = (
+            await _retry_rpc_async(rpc.get_multiple_accounts)(
+                [pool_keys.base_vault, pool_keys.quote_vault], commitment=Processed
+            )
+        ).value
+        return amm_v4_reserves_from_balances(
+            pool_keys, token_account_amount(base_account.data), token_account_amount(quote_account.data)
+        )
+    except Exception as e:
+        logger.error("Error occurred: %s", e)
+        return None, None, None
+
+async def fetch_pool_bundle_async(pair_address: str) -> tuple:
+    rpc = AsyncSolanaProvider.get_instance().rpc
+    try:
+        pool_keys = get_cached_amm_v4_pool_keys(pair_address)
+        if pool_keys is not None:
+            base_account, quote_account = (
+                await _retry_rpc_async(rpc.get_multiple_accounts)(
+                    [pool_keys.base_vault, pool_keys.quote_vault], commitment=Processed
+                )
+            ).value
+        else:
+            amm_id = pubkey_from_string(pair_address)
+            amm_data = get_scanned_amm_v4_account_data(pair_address)
+            if amm_data is None:
+                amm_data = (await _retry_rpc_async(rpc.get_account_info)(amm_id, commitment=Processed)).value.data
+            amm_decoded = parse_liquidity_state_v4_keys(amm_data)
+            market_account, base_account, quote_account = (
+                await _retry_rpc_async(rpc.get_multiple_accounts)(
+                    [
+                        Pubkey.from_bytes(amm_decoded.serumMarket),
+                        Pubkey.from_bytes(amm_decoded.poolCoinTokenAccount),
+                        Pubkey.from_bytes(amm_decoded.poolPcTokenAccount),
+                    ],
+                    commitment=Processed,
+                )
+            ).value
+            pool_keys = decode_amm_v4_pool_keys(amm_id, amm_data, market_account.data)
+            cache_amm_v4_pool_keys(pair_address, pool_keys)
+        
+        base_reserve, quote_reserve, token_decimal = amm_v4_reserves_from_balances(
+            pool_keys, token_account_amount(base_account.data), token_account_amount(quote_account.data)
+        )
+        return pool_keys, base_reserve, quote_reserve, token_decimal
+    except Exception as e:
+        logger.error("Error fetching AMMv4 pool bundle: %s", e)
+        return None, None, None, None
+
+async def fetch_pair_accounts_from_rpc_async(
+    program_id: Pubkey, 
+    token_mint: str, 
+    quote_offset: int, 
+    base_offset: int, 
+    data_length: int,
+    with_data: bool = True
+) -> list:
+    try:
+        pubkey_from_string(token_mint)
+    except ValueError:
+        logger.error("Invalid token mint address: %s", token_mint)
+        return []
+    default_quote_mint = get_config().DEFAULT_QUOTE_MINT
+    provider = AsyncSolanaProvider.get_instance()
+
+    async def fetch_pair(base_mint: str, quote_mint: str) -> list:
+        memcmp_filter_base = MemcmpOpts(offset=quote_offset, bytes=quote_mint)
+        memcmp_filter_quote = MemcmpOpts(offset=base_offset, bytes=base_mint)
+        try:
+            response = await _retry_rpc_async(provider.rpc.get_program_accounts)(
+                program_id,
+                commitment=Processed,
+                filters=[data_length, memcmp_filter_base, memcmp_filter_quote],
+            )
+            return list(response.value)
+        except Exception as e:
+            logger.error("Error fetching AMM pair addresses: %s", e)
+        return []
+
+    try:
+        logger.debug("Fetching pair addresses for mints %s and %s in both orders", token_mint, default_quote_mint)
+        direct, reversed_ = await _retry_rpc_async(provider.batch)(
+            *_pair_requests(program_id, token_mint, quote_offset, base_offset, data_length, with_data)
+        )
+        pair_accounts = list(direct.value) or list(reversed_.value)
+    except Exception as e:
+        # Same fallback as the sync lookup, with both orders queried concurrently
+        logger.warning("Batched AMM pair lookup failed, querying each order: %s", e)
+        direct, reversed_ = await asyncio.gather(
+            fetch_pair(token_mint, default_quote_mint), fetch_pair(default_quote_mint, token_mint)
+        )
+        pair_accounts = direct or reversed_
+
+    if pair_accounts:
+        logger.debug("Found %d matching AMM account(s).", len(pair_accounts))
+    else:
+        logger.debug("No matching AMM accounts found.")
+    return pair_accounts
+
+async def fetch_pair_address_from_rpc_async(
+    program_id: Pubkey, 
+    token_mint: str, 
+    quote_offset: int, 
+    base_offset: int, 
+    data_length: int
+) -> list:
+    pair_accounts = await fetch_pair_accounts_from_rpc_async(
+        program_id, token_mint, quote_offset, base_offset, data_length, with_data=False
+    )
+    return [str(account.pubkey) for account in pair_accounts]
+
+async def get_amm_v4_pair_from_rpc_async(token_mint: str) -> list:
+    pair_accounts = await fetch_pair_accounts_from_rpc_async(
+        program_id=get_config().RAYDIUM_AMM_V4,
         token_mint=token_mint,
         quote_offset=400,
         base_offset=432,
         data_length=752,
     )
+    return _keep_scanned_amm_v4_accounts(pair_accounts)